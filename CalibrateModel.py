@@ -0,0 +1,20 @@
+import asthma_cost_eval.input_data as data
+import asthma_param_uncertainity.calibration_classes as calib
+
+# observed targets (replace with the estimates from the registry)
+targets = calib.CalibrationTargets()
+targets.add_prevalence(week=26, state=data.HealthStates.SUBOPTIMAL, value=0.065, st_dev=0.005)
+targets.add_prevalence(week=52, state=data.HealthStates.SUBOPTIMAL, value=0.065, st_dev=0.005)
+targets.add_prevalence(week=52, state=data.HealthStates.ASTHMA, value=0.010, st_dev=0.002)
+# mean time to the last exacerbation within the simulation length among patients with one
+targets.set_time_to_asthma(value=20, st_dev=2)
+
+# calibrate the transition probability matrix of daily therapy
+calibration = calib.ABCCalibration(targets=targets, prob_matrix=data.S_TRANS_MATRIX_DAILY)
+calibration.run(n_candidates=200000, n_accepted=1000, seed=0)
+
+print('Calibrated transition probability matrix (posterior mean):')
+print(calibration.calibratedProbMatrix.round(4))
+
+# save the posterior draws to be used by ParameterGenerator (via MultiCohort's prob_matrix_draws)
+calibration.save(file_name='calibrated_prob_matrix_daily.npy')
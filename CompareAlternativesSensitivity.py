@@ -35,6 +35,12 @@ support.print_outcomes(multi_cohort_outcomes=multiCohortINTER.multiCohortOutcome
 support.print_comparative_outcomes(multi_cohort_outcomes_daily=multiCohortDAILY.multiCohortOutcomes,
                                    multi_cohort_outcomes_inter=multiCohortINTER.multiCohortOutcomes)
 
+# export the weekly prevalence of each health state with uncertainty intervals
+multiCohortDAILY.multiCohortOutcomes.occupancy.export_csv(file_name='Prevalence_daily_sensitivity.csv',
+                                                          alpha=data.ALPHA)
+multiCohortINTER.multiCohortOutcomes.occupancy.export_csv(file_name='Prevalence_inter_sensitivity.csv',
+                                                          alpha=data.ALPHA)
+
 # report the CEA results
 support.report_CEA_CBA(multi_cohort_outcomes_daily=multiCohortDAILY.multiCohortOutcomes,
                        multi_cohort_outcomes_inter=multiCohortINTER.multiCohortOutcomes)
\ No newline at end of file
@@ -0,0 +1,28 @@
+import asthma_cost_eval.batch_classes as batch
+import asthma_cost_eval.input_data as data
+import asthma_cost_eval.param_classes as param
+import asthma_cost_eval.support as support
+
+# strategies to compare (the first one is the base strategy)
+strategies = [
+    (param.Therapies.DAILY, param.AgeGroups.SCHOOL),
+    (param.Therapies.INTERMITTENT, param.AgeGroups.SCHOOL),
+    (param.Therapies.DAILY, param.AgeGroups.PRESCHOOL),
+    (param.Therapies.INTERMITTENT, param.AgeGroups.PRESCHOOL),
+]
+names = ['{} ({})'.format(therapy.name.title(), age_group.name.title()) for therapy, age_group in strategies]
+
+# simulate one cohort under all strategies in one batched pass with shared random numbers
+multi_strategy_cohort = batch.MultiStrategyCohort(
+    id=0,
+    pop_size=data.POP_SIZE,
+    parameter_sets=[param.Parameters(therapy=therapy, age_group=age_group) for therapy, age_group in strategies],
+    names=names)
+multi_strategy_cohort.simulate(n_time_steps=data.SIM_TIME_STEPS)
+
+# print the outcomes of each strategy
+for name, outcomes in zip(names, multi_strategy_cohort.cohortOutcomes):
+    support.print_outcomes(sim_outcomes=outcomes, therapy_name=name)
+
+# report the CEA results of all strategies
+support.report_CEA_CBA_strategies(names=names, sim_outcomes=multi_strategy_cohort.cohortOutcomes)
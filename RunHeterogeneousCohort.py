@@ -0,0 +1,20 @@
+import numpy as np
+
+import asthma_cost_eval.input_data as data
+import asthma_cost_eval.param_classes as param
+import asthma_cost_eval.population_classes as population
+import asthma_cost_eval.support as support
+
+POP_SIZE = 1000000  # population size of the heterogeneous cohort
+
+# sample the attributes of the patients
+# (or read them from a patient file with population.read_patient_attributes(file_name))
+attributes = population.sample_patient_attributes(n=POP_SIZE, rng=np.random.RandomState(seed=0))
+
+for therapy in param.Therapies:
+    # create and simulate a heterogeneous cohort
+    cohort = population.HeterogeneousCohort(id=1, therapy=therapy, patient_attributes=attributes)
+    cohort.simulate(n_time_steps=data.SIM_TIME_STEPS)
+
+    # print the outcomes of this simulated cohort
+    support.print_outcomes(sim_outcomes=cohort.cohortOutcomes, therapy_name=therapy)
@@ -0,0 +1,23 @@
+import asthma_cost_eval.input_data as data
+import asthma_cost_eval.long_horizon as horizon
+import asthma_cost_eval.param_classes as param
+
+for therapy in param.Therapies:
+
+    # parameters converted to the selected cycle length
+    params = horizon.get_parameters_for_cycle(parameters=param.Parameters(therapy=therapy),
+                                              cycle_length=data.CYCLE_LENGTH)
+
+    print(therapy)
+    for sim_horizon in data.LONG_HORIZONS:
+        # expected outcomes over the horizon (no simulation)
+        expectations = horizon.CohortExpectations(
+            parameters=params,
+            n_time_steps=horizon.get_n_cycles(horizon=sim_horizon, cycle_length=data.CYCLE_LENGTH))
+
+        print("  Horizon of {} weeks:".format(sim_horizon))
+        print("    Expected discounted cost: {:,.0f}".format(expectations.expectedDiscountedCost))
+        print("    Expected discounted utility: {:.2f}".format(expectations.expectedDiscountedUtility))
+        print("    Expected weeks in Asthma: {:.2f}".format(
+            expectations.expectedCyclesInStates[data.HealthStates.ASTHMA.value] * data.CYCLE_LENGTH))
+    print("")
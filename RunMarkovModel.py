@@ -18,3 +18,6 @@ myCohort.simulate(n_time_steps=data.SIM_TIME_STEPS)
 # print the outcomes of this simulated cohort
 Support.print_outcomes(sim_outcomes=myCohort.cohortOutcomes,
                        therapy_name=therapy)
+
+# export the weekly prevalence of each health state
+myCohort.stateOccupancy.export_csv(file_name='Prevalence.csv', alpha=data.ALPHA)
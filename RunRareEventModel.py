@@ -0,0 +1,19 @@
+import asthma_cost_eval.input_data as data
+import asthma_cost_eval.param_classes as param
+import asthma_cost_eval.rare_event_classes as rare
+import asthma_cost_eval.support as support
+
+POP_SIZE = 2000     # population size (importance sampling needs fewer patients than data.POP_SIZE)
+
+for therapy in param.Therapies:
+    # create a cohort sampled with inflated probabilities of asthma exacerbation
+    cohort = rare.ImportanceSamplingCohort(id=1,
+                                           pop_size=POP_SIZE,
+                                           parameters=param.Parameters(therapy=therapy))
+
+    # simulate the cohort over the specified time steps
+    cohort.simulate(n_time_steps=data.SIM_TIME_STEPS)
+
+    # print the weighted estimates of this simulated cohort
+    support.print_rare_event_outcomes(sim_outcomes=cohort.cohortOutcomes,
+                                      therapy_name=therapy)
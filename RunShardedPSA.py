@@ -0,0 +1,79 @@
+"""
+runs the probabilistic sensitivity analysis in shards, e.g. on 16 nodes:
+    python RunShardedPSA.py simulate --shard 3/16 --dir psa_shards
+and, once all shards are done, merges the shard files and reports the CEA results:
+    python RunShardedPSA.py merge --dir psa_shards
+"""
+import argparse
+import glob
+import os
+
+import asthma_cost_eval.input_data as data
+import asthma_param_uncertainity.model_classes as model
+import asthma_param_uncertainity.param_classes as param
+import asthma_param_uncertainity.support as support
+
+N_COHORTS = 1000  # number of cohorts
+POP_SIZE = 259  # population size of each cohort
+
+
+def simulate_shard(shard, dir_name):
+    """ simulates one shard of the multi-cohorts of both therapies and writes the shard files
+    :param shard: shard to simulate as 'k/n'
+    :param dir_name: directory to write the shard files to
+    """
+
+    os.makedirs(dir_name, exist_ok=True)
+    shard_index, n_shards = model.parse_shard(shard)
+
+    for therapy in param.Therapies:
+        multi_cohort = model.MultiCohort(
+            ids=range(N_COHORTS),
+            pop_size=POP_SIZE,
+            therapy=therapy,
+            shard=shard
+        )
+        multi_cohort.simulate(n_time_steps=data.SIM_TIME_STEPS)
+
+        model.write_shard_file(
+            simulated_multi_cohort=multi_cohort,
+            file_name=os.path.join(dir_name, '{}_shard_{:04d}_of_{:04d}.npz'.format(
+                therapy.name, shard_index, n_shards)))
+
+
+def merge_shards(dir_name):
+    """ merges the shard files of both therapies and reports the results
+    :param dir_name: directory where the shard files are written
+    """
+
+    outcomes = {}
+    for therapy in param.Therapies:
+        outcomes[therapy] = model.merge_shard_files(
+            file_names=sorted(glob.glob(os.path.join(dir_name, '{}_shard_*.npz'.format(therapy.name)))))
+
+    # print the estimates for the mean time to asthma exacerbation, cost and utility
+    support.print_outcomes(multi_cohort_outcomes=outcomes[param.Therapies.DAILY],
+                           therapy_name=param.Therapies.DAILY)
+    support.print_outcomes(multi_cohort_outcomes=outcomes[param.Therapies.INTERMITTENT],
+                           therapy_name=param.Therapies.INTERMITTENT)
+
+    # print comparative outcomes
+    support.print_comparative_outcomes(multi_cohort_outcomes_daily=outcomes[param.Therapies.DAILY],
+                                       multi_cohort_outcomes_inter=outcomes[param.Therapies.INTERMITTENT])
+
+    # report the CEA results
+    support.report_CEA_CBA(multi_cohort_outcomes_daily=outcomes[param.Therapies.DAILY],
+                           multi_cohort_outcomes_inter=outcomes[param.Therapies.INTERMITTENT])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sharded probabilistic sensitivity analysis')
+    parser.add_argument('command', choices=['simulate', 'merge'])
+    parser.add_argument('--shard', default='1/1', help='shard to simulate as k/n (1 <= k <= n)')
+    parser.add_argument('--dir', default='psa_shards', help='directory of the shard files')
+    args = parser.parse_args()
+
+    if args.command == 'simulate':
+        simulate_shard(shard=args.shard, dir_name=args.dir)
+    else:
+        merge_shards(dir_name=args.dir)
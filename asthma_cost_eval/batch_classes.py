@@ -0,0 +1,53 @@
+import numpy as np
+
+from asthma_cost_eval.input_data import KERNEL_CHUNK_SIZE
+from asthma_cost_eval.model_classes import CohortOutcomes
+from asthma_cost_eval.patient_kernel import ParameterTables, simulate_batch
+from asthma_cost_eval.prevalence_classes import StateOccupancy
+
+
+class MultiStrategyCohort:
+    """ simulates one cohort under several strategies in one batched pass with shared random numbers """
+
+    def __init__(self, id, pop_size, parameter_sets, names):
+        """
+        :param id: cohort ID (used as the seed of the random number generator)
+        :param pop_size: population size of the cohort
+        :param parameter_sets: (list) parameter set of each strategy
+        :param names: (list) name of each strategy
+        """
+
+        self.id = id
+        self.popSize = pop_size
+        self.paramSets = parameter_sets
+        self.names = names
+        self.cohortOutcomes = []     # outcomes of the cohort under each strategy
+        self.stateOccupancies = []   # state occupancy of the cohort under each strategy
+
+    def simulate(self, n_time_steps):
+        """ simulate the cohort under all strategies in chunks of patients
+        :param n_time_steps: number of time steps to simulate the cohort
+        """
+
+        tables = ParameterTables(parameter_sets=self.paramSets)
+        rng = np.random.RandomState(seed=self.id)
+
+        self.cohortOutcomes = [CohortOutcomes() for _ in self.paramSets]
+        self.stateOccupancies = [StateOccupancy(n_time_steps=n_time_steps, n_states=tables.cumProbMatrices.shape[1])
+                                 for _ in self.paramSets]
+
+        for start in range(0, self.popSize, KERNEL_CHUNK_SIZE):
+            n_patients = min(KERNEL_CHUNK_SIZE, self.popSize - start)
+            groups = np.repeat(np.arange(len(self.paramSets))[:, np.newaxis], n_patients, axis=1)
+
+            times_to_asthma, costs, utilities, occupancy_counts, _ = simulate_batch(
+                tables=tables, groups=groups, n_time_steps=n_time_steps, rng=rng)
+
+            # store outputs of this chunk
+            for s in range(len(self.paramSets)):
+                self.cohortOutcomes[s].extract_outcomes(
+                    times_to_asthma=times_to_asthma[s], costs=costs[s], utilities=utilities[s])
+                self.stateOccupancies[s].counts += occupancy_counts[s]
+
+        for outcomes in self.cohortOutcomes:
+            outcomes.calculate_cohort_outcomes()
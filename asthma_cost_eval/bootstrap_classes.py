@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+class BootstrapCEA:
+    """ bootstrap of the incremental cost, effect, ICER and net monetary benefit of a new strategy
+    with respect to a base strategy, when the patients of the two strategies are simulated independently """
+
+    def __init__(self, costs_base, effects_base, costs_new, effects_new,
+                 n_resamples=1000, seed=0, method='index', batch_size=100, n_workers=1):
+        """
+        :param costs_base: (list) patients' costs under the base strategy
+        :param effects_base: (list) patients' effects under the base strategy
+        :param costs_new: (list) patients' costs under the new strategy
+        :param effects_new: (list) patients' effects under the new strategy
+        :param n_resamples: number of bootstrap resamples
+        :param seed: seed of the random number generators (results do not depend on n_workers)
+        :param method: 'index' to draw resample indices with replacement or
+                       'poisson' for Poisson(1)-weighted resampling
+        :param batch_size: number of resamples drawn as one matrix
+        :param n_workers: number of processes to draw the batches of resamples (1 to draw them in this process);
+                          processes only pay off for large inputs, as each one has to be spawned and sent the
+                          observations
+        """
+
+        if method not in ('index', 'poisson'):
+            raise ValueError("Bootstrap method should be 'index' or 'poisson'.")
+
+        self.method = method
+
+        # (2, n) matrices of cost and effect observations of each strategy
+        obs_base = np.array([costs_base, effects_base], dtype=float)
+        obs_new = np.array([costs_new, effects_new], dtype=float)
+
+        # point estimates
+        self.diffCost = obs_new[0].mean() - obs_base[0].mean()
+        self.diffEffect = obs_new[1].mean() - obs_base[1].mean()
+
+        # one independent random number generator per batch
+        batch_sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+        seed_sequences = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+
+        args = [(obs_base, obs_new, size, seed_sequence, method)
+                for size, seed_sequence in zip(batch_sizes, seed_sequences)]
+
+        # resampling is bound by the global interpreter lock, so batches are drawn in separate processes
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                diffs = np.concatenate(list(executor.map(_resample_batch, *zip(*args))))
+        else:
+            diffs = np.concatenate([_resample_batch(*arg) for arg in args])
+
+        self.diffCosts = diffs[:, 0]        # bootstrap incremental costs
+        self.diffEffects = diffs[:, 1]      # bootstrap incremental effects
+
+    def get_ICER(self):
+        """ :return: the ICER (nan if the incremental effect is zero) """
+        if self.diffEffect == 0:
+            return np.nan
+        return self.diffCost / self.diffEffect
+
+    def get_ICER_interval(self, alpha):
+        """
+        :param alpha: significance level
+        :return: (list) percentile bootstrap confidence interval of the ICER; [nan, nan] if the bootstrap
+                 incremental effects are zero or change sign, since the ICER is then undefined or not ordered
+                 (use get_NMB_intervals instead)
+        """
+
+        if np.any(self.diffEffects == 0) or self.diffEffects.min() < 0 < self.diffEffects.max():
+            return [np.nan, np.nan]
+
+        icers = self.diffCosts / self.diffEffects
+        return np.percentile(icers, [100 * alpha / 2, 100 * (1 - alpha / 2)]).tolist()
+
+    def get_NMBs(self, wtp_values):
+        """
+        :param wtp_values: (list) willingness-to-pay values
+        :return: (n_resamples, n_wtp_values) matrix of bootstrap incremental net monetary benefits
+        """
+        return np.outer(self.diffEffects, wtp_values) - self.diffCosts[:, np.newaxis]
+
+    def get_NMB_intervals(self, wtp_values, alpha):
+        """
+        :param wtp_values: (list) willingness-to-pay values
+        :param alpha: significance level
+        :return: (tuple) incremental net monetary benefit at each willingness-to-pay value and the
+                 lower and upper bounds of its percentile bootstrap confidence interval
+        """
+
+        nmbs = self.get_NMBs(wtp_values=wtp_values)
+        estimates = np.asarray(wtp_values, dtype=float) * self.diffEffect - self.diffCost
+
+        return (estimates,
+                np.percentile(nmbs, 100 * alpha / 2, axis=0),
+                np.percentile(nmbs, 100 * (1 - alpha / 2), axis=0))
+
+    def get_prob_cost_effective(self, wtp_values):
+        """
+        :param wtp_values: (list) willingness-to-pay values
+        :return: (array) probability that the new strategy has a positive incremental net monetary benefit
+        """
+        return (self.get_NMBs(wtp_values=wtp_values) > 0).mean(axis=0)
+
+
+def _resample_batch(obs_base, obs_new, n_resamples, seed_sequence, method):
+    """
+    :param obs_base: (2, n) matrix of cost and effect observations of the base strategy
+    :param obs_new: (2, m) matrix of cost and effect observations of the new strategy
+    :param n_resamples: number of resamples
+    :param seed_sequence: seed sequence of the random number generator of this batch
+    :param method: 'index' or 'poisson'
+    :return: (n_resamples, 2) matrix of resampled incremental cost and effect
+    """
+
+    rng = np.random.default_rng(seed_sequence)
+    means_base = _get_resampled_means(obs=obs_base, n_resamples=n_resamples, rng=rng, method=method)
+    means_new = _get_resampled_means(obs=obs_new, n_resamples=n_resamples, rng=rng, method=method)
+    return means_new - means_base
+
+
+def _get_resampled_means(obs, n_resamples, rng, method):
+    """
+    :param obs: (2, n) matrix of cost and effect observations
+    :param n_resamples: number of resamples
+    :param rng: random number generator
+    :param method: 'index' or 'poisson'
+    :return: (n_resamples, 2) matrix of resampled mean cost and effect
+    """
+
+    n = obs.shape[1]
+    if method == 'index':
+        # each row holds the indices of one resample
+        indices = rng.integers(0, n, size=(n_resamples, n))
+        return obs[:, indices].mean(axis=2).T
+    else:
+        weights = rng.poisson(1, size=(n_resamples, n)).astype(float)
+        return (weights @ obs.T) / weights.sum(axis=1, keepdims=True)
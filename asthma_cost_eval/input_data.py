@@ -1,10 +1,28 @@
+import os
 from enum import Enum
 
 # simulation settings
 POP_SIZE = 10000        # cohort population size
 SIM_TIME_STEPS = 52   # length of simulation (weeks)
+KERNEL_CHUNK_SIZE = 10000   # number of patients simulated per call of the compiled kernel
+CYCLE_LENGTH = 1    # length of a simulation cycle (weeks) for long-horizon runs (a whole number of weeks)
+LONG_HORIZONS = [260, 520, 1040]    # long simulation horizons (weeks)
 ALPHA = 0.05        # significance level for calculating confidence intervals
 DISCOUNT = 0    # annual discount rate
+N_BOOTSTRAP = 1000  # number of bootstrap resamples for ICER and net monetary benefit intervals
+N_WORKERS = os.cpu_count() or 1     # number of processes for bootstrap resampling of large inputs
+MIN_PARALLEL_BOOTSTRAP_SIZE = 2 * 10 ** 8   # number of resampled observations (resamples x patients) above which
+                                            # the bootstrap uses N_WORKERS processes (below, spawning costs more)
+
+# heterogeneous populations
+RISK_MULTIPLIER_MEAN = 1        # mean of the (gamma) multiplier of the baseline exacerbation risk
+RISK_MULTIPLIER_ST_DEV = 0.3    # standard deviation of the multiplier of the baseline exacerbation risk
+PRESCHOOL_SHARE = 0.3           # proportion of preschool children
+ADHERENCE_BETA_A = 8            # parameter a of the beta distribution of adherence
+ADHERENCE_BETA_B = 2            # parameter b of the beta distribution of adherence
+NON_ADHERENCE_RISK_INCREASE = 1     # relative increase in exacerbation risk of a fully non-adherent patient
+N_RISK_BINS = 20        # number of bins to discretize the risk multiplier into
+N_ADHERENCE_BINS = 10   # number of bins to discretize adherence into
 
 
 class HealthStates(Enum):
@@ -69,6 +87,11 @@ PS_HEALTH_COST_INTERMITTENT = [
     397.59, # ASTHMA
 ]
 
+# part of the health costs of daily ICS that is the cost of the daily doses (the difference from intermittent ICS);
+# intermittent doses are taken as needed, so none of their cost depends on adherence
+S_DAILY_DOSE_COST = [daily - inter for daily, inter in zip(S_HEALTH_COST_DAILY, S_HEALTH_COST_INTERMITTENT)]
+PS_DAILY_DOSE_COST = [daily - inter for daily, inter in zip(PS_HEALTH_COST_DAILY, PS_HEALTH_COST_INTERMITTENT)]
+
 
 # annual health utility of each health state
 ANNUAL_STATE_UTILITY = [
@@ -0,0 +1,150 @@
+import copy
+
+import numpy as np
+from scipy.linalg import fractional_matrix_power
+
+
+def convert_prob_matrix(prob_matrix, cycle_length, tolerance=1e-8):
+    """ converts a weekly transition probability matrix to a matrix for cycles of the given length
+    :param prob_matrix: weekly transition probability matrix
+    :param cycle_length: length of the new cycle (weeks); integers use matrix powers, other values
+                         use (real) fractional matrix powers, e.g. 0.5 for the square root
+    :param tolerance: largest imaginary part and largest negative mass (per row) of the fractional power
+                      that may be discarded
+    :return: (numpy array) transition probability matrix of the new cycle
+    :raises ValueError: if the matrix has no (approximately) stochastic real root of the given order,
+                        e.g. when it has negative eigenvalues
+    """
+
+    matrix = np.asarray(prob_matrix, dtype=float)
+
+    if float(cycle_length).is_integer():
+        return np.linalg.matrix_power(matrix, int(cycle_length))
+
+    # roots of a stochastic matrix may have small negative or complex entries from round-off;
+    # larger ones mean that no stochastic root exists
+    converted = fractional_matrix_power(matrix, cycle_length)
+    max_imaginary = np.abs(np.imag(converted)).max()
+    converted = np.real(converted)
+    max_negative_mass = np.clip(-converted, 0, None).sum(axis=1).max()
+    if max_imaginary > tolerance or max_negative_mass > tolerance:
+        raise ValueError('The transition probability matrix has no stochastic fractional power for a cycle '
+                         'length of {} weeks (largest imaginary part {:.3g}, largest negative mass {:.3g}); '
+                         'use a cycle length that is a multiple of a week.'.format(
+                             cycle_length, max_imaginary, max_negative_mass))
+
+    # project the result back to a row-stochastic matrix
+    converted = np.clip(converted, 0, None)
+    return converted / converted.sum(axis=1, keepdims=True)
+
+
+def get_parameters_for_cycle(parameters, cycle_length):
+    """
+    :param parameters: parameters of the weekly model
+    :param cycle_length: length of a simulation cycle (weeks)
+    :return: a copy of the parameters with the transition probability matrix converted
+             and the per-cycle costs, utilities and discount rate scaled to the new cycle length;
+             note that a Cohort simulated with these parameters reports time to asthma in cycles
+             (multiply by cycle_length for weeks)
+
+    For whole numbers of weeks, the per-cycle state costs and utilities C are chosen so that the
+    half-cycle corrected value of a cycle, (C + P^L C) / 2, equals the expected value of its L weeks in the
+    weekly model, (I + P)(I + P + ... + P^(L-1)) c / 2; undiscounted expected costs and utilities over a
+    horizon of whole cycles are then the same as with weekly cycles. Within a cycle, discounting is at the
+    middle of the cycle, so discounted outcomes are approximate. Other cycle lengths scale c by L (approximate).
+    """
+
+    params = copy.copy(parameters)
+
+    weekly_matrix = np.asarray(parameters.probMatrix, dtype=float)
+    cycle_matrix = convert_prob_matrix(prob_matrix=weekly_matrix, cycle_length=cycle_length)
+    params.probMatrix = cycle_matrix.tolist()
+
+    if float(cycle_length).is_integer():
+        identity = np.identity(len(weekly_matrix))
+        sum_of_powers, _ = get_sum_of_powers(matrix=weekly_matrix, n=int(cycle_length))
+        # matrix that maps weekly state values to per-cycle state values
+        cycle_values = np.linalg.solve(identity + cycle_matrix, (identity + weekly_matrix) @ sum_of_powers)
+    else:
+        cycle_values = cycle_length * np.identity(len(weekly_matrix))
+
+    params.annualStateCosts = (cycle_values @ np.asarray(parameters.annualStateCosts, dtype=float)).tolist()
+    params.annualStateUtilities = (
+        cycle_values @ np.asarray(parameters.annualStateUtilities, dtype=float)).tolist()
+    params.annualTreatmentCost = parameters.annualTreatmentCost * cycle_length
+    params.discountRate = (1 + parameters.discountRate) ** cycle_length - 1
+
+    return params
+
+
+def get_n_cycles(horizon, cycle_length):
+    """
+    :param horizon: simulation horizon (weeks)
+    :param cycle_length: length of a simulation cycle (weeks)
+    :return: number of cycles to simulate
+    :raises ValueError: if the horizon is not a whole number of cycles
+    """
+
+    n_cycles = horizon / cycle_length
+    if abs(n_cycles - round(n_cycles)) > 1e-9:
+        raise ValueError('The horizon of {} weeks is not a whole number of cycles of {} weeks.'.format(
+            horizon, cycle_length))
+    return int(round(n_cycles))
+
+
+def get_sum_of_powers(matrix, n):
+    """ calculates I + A + A^2 + ... + A^(n-1) and A^n by repeated squaring
+    :param matrix: the square matrix A
+    :param n: number of terms
+    :return: (tuple) (sum of powers, n-th power)
+    """
+
+    size = len(matrix)
+    # running result (starting with 0 terms) and base (1 term, doubled at each bit of n)
+    result_sum, result_power = np.zeros((size, size)), np.identity(size)
+    base_sum, base_power = np.identity(size), np.asarray(matrix, dtype=float)
+
+    while n > 0:
+        if n & 1:
+            result_sum = result_sum + result_power @ base_sum
+            result_power = result_power @ base_power
+        base_sum = base_sum + base_power @ base_sum
+        base_power = base_power @ base_power
+        n >>= 1
+
+    return result_sum, result_power
+
+
+class CohortExpectations:
+    """ expected outcomes of a patient over the simulation horizon, calculated from the transition
+    probability matrix (without simulation) in O(log(n_time_steps)) matrix products """
+
+    def __init__(self, parameters, n_time_steps):
+        """
+        :param parameters: parameters (use get_parameters_for_cycle to change the cycle length)
+        :param n_time_steps: number of cycles in the simulation horizon
+        """
+
+        prob_matrix = np.asarray(parameters.probMatrix, dtype=float)
+        costs = np.asarray(parameters.annualStateCosts, dtype=float)
+        utilities = np.asarray(parameters.annualStateUtilities, dtype=float)
+
+        # initial state distribution
+        initial_probs = np.zeros(len(prob_matrix))
+        initial_probs[parameters.initialHealthState.value] = 1
+
+        # discount factor for a half cycle
+        half_cycle_discount = 1 / (1 + parameters.discountRate / 2)
+
+        # expected (discounted) number of cycles started in each state
+        discounted_sum, _ = get_sum_of_powers(matrix=half_cycle_discount ** 2 * prob_matrix, n=n_time_steps)
+        occupancy_sum, final_power = get_sum_of_powers(matrix=prob_matrix, n=n_time_steps)
+
+        # expected cost and utility of a cycle started in each state (corrected for the half-cycle effect)
+        cycle_costs = 0.5 * (costs + prob_matrix @ costs) + parameters.annualTreatmentCost
+        cycle_utilities = 0.5 * (utilities + prob_matrix @ utilities)
+
+        self.expectedDiscountedCost = half_cycle_discount * initial_probs @ discounted_sum @ cycle_costs
+        self.expectedDiscountedUtility = half_cycle_discount * initial_probs @ discounted_sum @ cycle_utilities
+        self.expectedCyclesInStates = initial_probs @ occupancy_sum     # expected cycles started in each state
+        self.finalStateProbs = initial_probs @ final_power      # state distribution at the end of the horizon
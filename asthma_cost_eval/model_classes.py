@@ -1,29 +1,43 @@
+from enum import Enum
+
 import numpy as np
 
 import deampy.econ_eval as econ
 import deampy.statistics as stat
 from deampy.markov import MarkovJumpProcess
-from asthma_cost_eval.input_data import HealthStates
-# from deampy.plots.sample_paths import PrevalencePathBatchUpdate
+from asthma_cost_eval.input_data import HealthStates, KERNEL_CHUNK_SIZE
+from asthma_cost_eval.patient_kernel import ParameterTables, simulate_batch
+from asthma_cost_eval.prevalence_classes import StateOccupancy
 
 
 class Patient:
-    def __init__(self, id, parameters):
+    def __init__(self, id, parameters, if_record_path=False, sampling_prob_matrix=None):
         """ initiates a patient
         :param id: ID of the patient
         :param parameters: an instance of the parameters class
+        :param if_record_path: set to True to record the health state of the patient at each time step
+        :param sampling_prob_matrix: (optional) transition probability matrix to sample the path from
+                                     (for importance sampling); the likelihood ratio of the path with respect
+                                     to parameters.probMatrix is recorded in the state monitor
         """
         self.id = id
         self.params = parameters
-        self.stateMonitor = PatientStateMonitor(parameters=parameters)
+        self.samplingProbMatrix = sampling_prob_matrix
+        self.stateMonitor = PatientStateMonitor(parameters=parameters, if_record_path=if_record_path)
 
-    def simulate(self, n_time_steps):
-        """ simulate the patient over the specified simulation length """
+    def simulate(self, n_time_steps, state_occupancy=None):
+        """ simulate the patient over the specified simulation length
+        :param n_time_steps: number of time steps to simulate the patient
+        :param state_occupancy: (optional) a StateOccupancy to record the patient's state at each time step
+        """
 
         # random number generator
         rng = np.random.RandomState(seed=self.id)
         # Markov jump process
-        markov_jump = MarkovJumpProcess(transition_prob_matrix=self.params.probMatrix)
+        if self.samplingProbMatrix is None:
+            markov_jump = MarkovJumpProcess(transition_prob_matrix=self.params.probMatrix)
+        else:
+            markov_jump = MarkovJumpProcess(transition_prob_matrix=self.samplingProbMatrix)
 
         k = 0  # simulation time step
 
@@ -35,8 +49,17 @@ class Patient:
                 current_state_index=self.stateMonitor.currentState.value,
                 rng=rng)
 
+            # update the likelihood ratio of the path if sampled from a different matrix
+            if self.samplingProbMatrix is not None:
+                current_state_index = self.stateMonitor.currentState.value
+                self.stateMonitor.likelihoodRatio *= \
+                    self.params.probMatrix[current_state_index][new_state_index] \
+                    / self.samplingProbMatrix[current_state_index][new_state_index]
+
             # update health state
             self.stateMonitor.update(time_step=k, new_state=HealthStates(new_state_index))
+            if state_occupancy is not None:
+                state_occupancy.record(time_step=k, state_index=new_state_index)
 
             # increment time
             k += 1
@@ -44,10 +67,12 @@ class Patient:
 
 class PatientStateMonitor:
     """ to update patient outcomes (years survived, cost, etc.) throughout the simulation """
-    def __init__(self, parameters):
+    def __init__(self, parameters, if_record_path=False):
 
         self.currentState = parameters.initialHealthState   # initial health state
-        self.asthmaTime = None      # time to exacerbation
+        self.asthmaTime = None      # time to exacerbation (in cycles of the parameters, weeks by default)
+        self.statePath = [] if if_record_path else None  # state index at the end of each time step
+        self.likelihoodRatio = 1    # likelihood ratio of the path (for importance sampling)
 
         # patient's cost and utility monitor
         self.costUtilityMonitor = PatientCostUtilityMonitor(parameters=parameters)
@@ -68,6 +93,10 @@ class PatientStateMonitor:
                                        current_state=self.currentState,
                                        next_state=new_state)
 
+        # record the new state
+        if self.statePath is not None:
+            self.statePath.append(new_state.value)
+
         # update current health state
         self.currentState = new_state
 
@@ -110,40 +139,100 @@ class PatientCostUtilityMonitor:
                                                               discount_period=2 * k + 1)
 
 
+class Backends(Enum):
+    """ engines to simulate the patients of a cohort """
+    OBJECT = 0      # one Patient object per patient
+    KERNEL = 1      # compiled per-patient kernel over flat arrays (numba if installed)
+
+
 class Cohort:
-    def __init__(self, id, pop_size, parameters):
+    def __init__(self, id, pop_size, parameters, backend=Backends.OBJECT):
         """ create a cohort of patients
         :param id: cohort ID
         :param pop_size: population size of this cohort
         :param parameters: parameters
+        :param backend: (Backends) engine to simulate the patients with
         """
         self.id = id
         self.popSize = pop_size
         self.params = parameters
+        self.backend = backend
         self.cohortOutcomes = CohortOutcomes()  # outcomes of this simulated cohort
+        self.stateOccupancy = None  # number of patients in each state at each time step
 
-    def simulate(self, n_time_steps):
+    def simulate(self, n_time_steps, outcome_writer=None):
         """ simulate the cohort of patients over the specified number of time-steps
         :param n_time_steps: number of time steps to simulate the cohort
+        :param outcome_writer: (optional) an OutcomeWriter to stream per-patient outcomes to disk
         """
 
+        self.stateOccupancy = StateOccupancy(n_time_steps=n_time_steps)
+
+        # with a writer, per-patient observations are only kept on disk
+        if outcome_writer is not None:
+            self.cohortOutcomes = CohortOutcomes(if_keep_observations=False)
+
+        if self.backend == Backends.KERNEL:
+            self._simulate_with_kernel(n_time_steps=n_time_steps, outcome_writer=outcome_writer)
+            return
+
+        if_record_path = outcome_writer is not None and outcome_writer.ifRecordPaths
+
         # populate and simulate the cohort
         for i in range(self.popSize):
             # create a new patient (use id * pop_size + n as patient id)
             patient = Patient(id=self.id * self.popSize + i,
-                              parameters=self.params)
+                              parameters=self.params,
+                              if_record_path=if_record_path)
             # simulate
-            patient.simulate(n_time_steps)
+            patient.simulate(n_time_steps, state_occupancy=self.stateOccupancy)
 
             # store outputs of this simulation
             self.cohortOutcomes.extract_outcome(simulated_patient=patient)
+            if outcome_writer is not None:
+                outcome_writer.add_patient(simulated_patient=patient)
+
+        # calculate cohort outcomes
+        self.cohortOutcomes.calculate_cohort_outcomes()
+
+    def _simulate_with_kernel(self, n_time_steps, outcome_writer=None):
+        """ simulate the cohort in chunks of patients with the compiled kernel
+        (random numbers come from one generator seeded by the cohort ID, so the paths differ from the
+        object backend but the outcomes follow the same distribution)
+        """
+
+        rng = np.random.RandomState(seed=self.id)
+        tables = ParameterTables(parameter_sets=[self.params])
+        if_record_paths = outcome_writer is not None and outcome_writer.ifRecordPaths
+
+        for start in range(0, self.popSize, KERNEL_CHUNK_SIZE):
+            n_patients = min(KERNEL_CHUNK_SIZE, self.popSize - start)
+
+            times_to_asthma, costs, utilities, occupancy_counts, state_paths = simulate_batch(
+                tables=tables, groups=np.zeros(n_patients, dtype=np.int64), n_time_steps=n_time_steps, rng=rng,
+                if_record_paths=if_record_paths)
+
+            # store outputs of this chunk
+            self.cohortOutcomes.extract_outcomes(times_to_asthma=times_to_asthma, costs=costs, utilities=utilities)
+            self.stateOccupancy.counts += occupancy_counts
+            if outcome_writer is not None:
+                outcome_writer.add_patients(
+                    patient_ids=self.id * self.popSize + start + np.arange(n_patients),
+                    times_to_asthma=times_to_asthma, costs=costs, utilities=utilities,
+                    state_paths=state_paths)
 
         # calculate cohort outcomes
         self.cohortOutcomes.calculate_cohort_outcomes()
 
 
 class CohortOutcomes:
-    def __init__(self):
+    def __init__(self, if_keep_observations=True):
+        """
+        :param if_keep_observations: set to False to only accumulate the summary statistics (the lists of
+                                     patients' outcomes then stay empty, so memory does not grow with the cohort)
+        """
+
+        self.ifKeepObservations = if_keep_observations
 
         self.timesToAsthma = []         # patients' times to asthma
         self.costs = []                 # patients' discounted costs
@@ -153,23 +242,59 @@ class CohortOutcomes:
         self.statCost = None            # summary statistics for discounted cost
         self.statUtility = None         # summary statistics for discounted utility
 
+        if not self.ifKeepObservations:
+            self.statTimeToAsthma = stat.DiscreteTimeStat(name='Time until Asthma Exacerbation')
+            self.statCost = stat.DiscreteTimeStat(name='Discounted cost')
+            self.statUtility = stat.DiscreteTimeStat(name='Discounted utility')
+
     def extract_outcome(self, simulated_patient):
         """ extracts outcome of a simulated patient
         :param simulated_patient: a simulated patients"""
 
         # record patient outcomes
+        state_monitor = simulated_patient.stateMonitor
+
+        if not self.ifKeepObservations:
+            if state_monitor.asthmaTime is not None:
+                self.statTimeToAsthma.record(state_monitor.asthmaTime)
+            self.statCost.record(state_monitor.costUtilityMonitor.totalDiscountedCost)
+            self.statUtility.record(state_monitor.costUtilityMonitor.totalDiscountedUtility)
+            return
 
         # time until exacerbation
-        if simulated_patient.stateMonitor.asthmaTime is not None:
-            self.timesToAsthma.append(simulated_patient.stateMonitor.asthmaTime)
+        if state_monitor.asthmaTime is not None:
+            self.timesToAsthma.append(state_monitor.asthmaTime)
         # discounted cost and discounted utility
-        self.costs.append(simulated_patient.stateMonitor.costUtilityMonitor.totalDiscountedCost)
-        self.utilities.append(simulated_patient.stateMonitor.costUtilityMonitor.totalDiscountedUtility)
+        self.costs.append(state_monitor.costUtilityMonitor.totalDiscountedCost)
+        self.utilities.append(state_monitor.costUtilityMonitor.totalDiscountedUtility)
+
+    def extract_outcomes(self, times_to_asthma, costs, utilities):
+        """ extracts outcomes of a batch of simulated patients
+        :param times_to_asthma: (array) patients' times to asthma (nan if no exacerbation)
+        :param costs: (array) patients' discounted costs
+        :param utilities: (array) patients' discounted utilities
+        """
+
+        if not self.ifKeepObservations:
+            for time_to_asthma in times_to_asthma[~np.isnan(times_to_asthma)].tolist():
+                self.statTimeToAsthma.record(time_to_asthma)
+            for cost, utility in zip(costs.tolist(), utilities.tolist()):
+                self.statCost.record(cost)
+                self.statUtility.record(utility)
+            return
+
+        self.timesToAsthma.extend(times_to_asthma[~np.isnan(times_to_asthma)].tolist())
+        self.costs.extend(costs.tolist())
+        self.utilities.extend(utilities.tolist())
 
     def calculate_cohort_outcomes(self):
         """ calculates the cohort outcomes
         """
 
+        # summary statistics were accumulated while extracting outcomes
+        if not self.ifKeepObservations:
+            return
+
         # summary statistics
         self.statTimeToAsthma = stat.SummaryStat(
             name='Time until Asthma Exacerbation', data=self.timesToAsthma)
@@ -0,0 +1,183 @@
+import os
+
+import numpy as np
+
+
+class OutcomeWriter:
+    """ streams per-patient outcomes (and optionally weekly state paths) to disk in
+    columnar chunks so that memory use does not grow with the cohort size; the 'weight' column holds the
+    likelihood ratio of each patient's path (1 unless sampled with importance sampling), so means over the
+    files should be weighted means """
+
+    def __init__(self, dir_name, chunk_size=10000, if_record_paths=False, if_compress=True):
+        """
+        :param dir_name: directory to write the chunks to (created if it does not exist); if the directory
+                         already has chunks, the numbering of new chunks continues after the existing ones
+                         (e.g. when one writer is used per cohort of a multi-cohort)
+        :param chunk_size: number of patients to buffer before writing a chunk to disk
+        :param if_record_paths: set to True to also store the state path of each patient
+        :param if_compress: set to True to write each chunk as one compressed .npz file, or to False to write
+                            each chunk as a directory of uncompressed .npy files (one per column) that can be
+                            memory-mapped (compressed chunks can only be read into memory)
+        """
+
+        self.dirName = dir_name
+        self.chunkSize = chunk_size
+        self.ifRecordPaths = if_record_paths
+        self.ifCompress = if_compress
+
+        # buffers for the current chunk
+        self._patientIDs = []
+        self._timesToAsthma = []
+        self._costs = []
+        self._utilities = []
+        self._weights = []
+        self._statePaths = []
+
+        os.makedirs(self.dirName, exist_ok=True)
+
+        # index of the next chunk (after the chunks already in the directory)
+        self.nextChunkIndex = 1 + max(
+            [_get_chunk_index(name) for name in get_chunk_file_names(self.dirName)], default=-1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_patient(self, simulated_patient):
+        """ buffers the outcomes of a simulated patient and writes a chunk once the buffer is full
+        :param simulated_patient: a simulated patient
+        """
+
+        state_monitor = simulated_patient.stateMonitor
+
+        self._patientIDs.append(simulated_patient.id)
+        # time to asthma (nan if the patient never had an exacerbation)
+        self._timesToAsthma.append(np.nan if state_monitor.asthmaTime is None else state_monitor.asthmaTime)
+        self._costs.append(state_monitor.costUtilityMonitor.totalDiscountedCost)
+        self._utilities.append(state_monitor.costUtilityMonitor.totalDiscountedUtility)
+        self._weights.append(state_monitor.likelihoodRatio)
+        if self.ifRecordPaths:
+            self._statePaths.append(state_monitor.statePath)
+
+        if len(self._patientIDs) >= self.chunkSize:
+            self.flush()
+
+    def add_patients(self, patient_ids, times_to_asthma, costs, utilities, state_paths=None, weights=None):
+        """ buffers the outcomes of a batch of simulated patients and writes a chunk each time the buffer is full
+        (so every chunk but the last has chunk_size patients, whatever the size of the batches)
+        :param patient_ids: (array) IDs of the patients
+        :param times_to_asthma: (array) patients' times to asthma (nan if no exacerbation)
+        :param costs: (array) patients' discounted costs
+        :param utilities: (array) patients' discounted utilities
+        :param state_paths: (2d array) state of each patient at the end of each time step
+        :param weights: (array) likelihood ratios of patients' paths (1 if None)
+        """
+
+        patient_ids = np.asarray(patient_ids)
+        times_to_asthma = np.asarray(times_to_asthma)
+        costs = np.asarray(costs)
+        utilities = np.asarray(utilities)
+        weights = np.ones(len(patient_ids)) if weights is None else np.asarray(weights)
+
+        start = 0
+        while start < len(patient_ids):
+            # fill the buffer up to the chunk size
+            end = start + self.chunkSize - len(self._patientIDs)
+
+            self._patientIDs.extend(patient_ids[start:end].tolist())
+            self._timesToAsthma.extend(times_to_asthma[start:end].tolist())
+            self._costs.extend(costs[start:end].tolist())
+            self._utilities.extend(utilities[start:end].tolist())
+            self._weights.extend(weights[start:end].tolist())
+            if self.ifRecordPaths:
+                self._statePaths.extend(list(state_paths[start:end]))
+
+            if len(self._patientIDs) >= self.chunkSize:
+                self.flush()
+            start = end
+
+    def flush(self):
+        """ writes the buffered patients (if any) to a new chunk file """
+
+        if len(self._patientIDs) == 0:
+            return
+
+        columns = dict(
+            patient_id=np.asarray(self._patientIDs, dtype=np.int64),
+            time_to_asthma=np.asarray(self._timesToAsthma, dtype=np.float32),
+            cost=np.asarray(self._costs, dtype=np.float32),
+            utility=np.asarray(self._utilities, dtype=np.float32),
+            weight=np.asarray(self._weights, dtype=np.float64))
+        if self.ifRecordPaths:
+            columns['state_path'] = np.asarray(self._statePaths, dtype=np.uint8)
+
+        chunk_name = os.path.join(self.dirName, 'outcomes_{:05d}'.format(self.nextChunkIndex))
+        if self.ifCompress:
+            np.savez_compressed(chunk_name + '.npz', **columns)
+        else:
+            os.makedirs(chunk_name)
+            for name, values in columns.items():
+                np.save(os.path.join(chunk_name, name + '.npy'), values)
+        self.nextChunkIndex += 1
+
+        # empty the buffers
+        self._patientIDs = []
+        self._timesToAsthma = []
+        self._costs = []
+        self._utilities = []
+        self._weights = []
+        self._statePaths = []
+
+    def close(self):
+        """ writes the remaining buffered patients to disk """
+        self.flush()
+
+
+def get_chunk_file_names(dir_name):
+    """
+    :param dir_name: directory where the chunks are written
+    :return: (list) paths of the chunks (.npz files or directories of .npy files) in the order they were written
+    """
+    names = [f for f in os.listdir(dir_name) if _get_chunk_index(f) is not None]
+    return [os.path.join(dir_name, f) for f in sorted(names, key=_get_chunk_index)]
+
+
+def scan_outcomes(dir_name, columns=None, mmap_mode=None):
+    """ iterates over the chunks of a directory one chunk at a time
+    :param dir_name: directory where the chunks are written
+    :param columns: (list) names of the columns to read (all columns if None)
+    :param mmap_mode: (e.g. 'r') to memory-map the columns of uncompressed chunks instead of reading them
+    :return: a generator of dictionaries mapping column names to the arrays of each chunk
+    """
+
+    for chunk_name in get_chunk_file_names(dir_name):
+        if chunk_name.endswith('.npz'):
+            with np.load(chunk_name) as chunk:
+                names = chunk.files if columns is None else columns
+                yield {name: chunk[name] for name in names}
+        else:
+            names = [f[:-len('.npy')] for f in sorted(os.listdir(chunk_name))] if columns is None else columns
+            yield {name: np.load(os.path.join(chunk_name, name + '.npy'), mmap_mode=mmap_mode) for name in names}
+
+
+def read_column(dir_name, column):
+    """
+    :param dir_name: directory where the chunks are written
+    :param column: name of the column to read (e.g. 'cost' or 'state_path')
+    :return: (numpy array) the values of the column over all chunks
+    """
+
+    return np.concatenate([chunk[column] for chunk in scan_outcomes(dir_name, columns=[column])])
+
+
+def _get_chunk_index(name):
+    """ :return: the index of a chunk from its file (or directory) name, or None if it is not a chunk """
+    stem = os.path.basename(name)
+    if stem.endswith('.npz'):
+        stem = stem[:-len('.npz')]
+    if stem.startswith('outcomes_') and stem[len('outcomes_'):].isdigit():
+        return int(stem[len('outcomes_'):])
+    return None
@@ -8,12 +8,21 @@ class Therapies(Enum):
     INTERMITTENT = 1
 
 
+class AgeGroups(Enum):
+    """ school vs preschool children """
+    SCHOOL = 0
+    PRESCHOOL = 1
+
+
 class Parameters:
-    def __init__(self, therapy):
+    def __init__(self, therapy, age_group=AgeGroups.SCHOOL):
 
         # selected therapy
         self.therapy = therapy
 
+        # selected age group
+        self.ageGroup = age_group
+
         # initial health state
         self.initialHealthState = data.HealthStates.WELL
 
@@ -23,17 +32,35 @@ class Parameters:
         # transition probability matrix of the selected therapy
         self.probMatrix = []
 
+        # part of the state costs that is only paid for the doses taken (scaled by adherence)
+        self.annualStateDoseCosts = [0] * len(data.HealthStates)
+
         # calculate transition probabilities
-        if self.therapy == Therapies.DAILY:
+        if self.therapy == Therapies.DAILY and self.ageGroup == AgeGroups.SCHOOL:
             # calculate transition probability matrix for the daily therapy
             self.probMatrix = data.S_TRANS_MATRIX_DAILY
             self.annualStateCosts = data.S_HEALTH_COST_DAILY
+            self.annualStateDoseCosts = data.S_DAILY_DOSE_COST
 
-        elif self.therapy == Therapies.INTERMITTENT:
+        elif self.therapy == Therapies.INTERMITTENT and self.ageGroup == AgeGroups.SCHOOL:
             # calculate transition probability matrix for intermittent therapy
             self.probMatrix = data.S_TRANS_MATRIX_INTERMITTENT
             self.annualStateCosts = data.S_HEALTH_COST_INTERMITTENT
 
+        elif self.therapy == Therapies.DAILY and self.ageGroup == AgeGroups.PRESCHOOL:
+            # transition probability matrix of preschool children for the daily therapy
+            self.probMatrix = data.PS_TRANS_MATRIX_DAILY
+            self.annualStateCosts = data.PS_HEALTH_COST_DAILY
+            self.annualStateDoseCosts = data.PS_DAILY_DOSE_COST
+
+        elif self.therapy == Therapies.INTERMITTENT and self.ageGroup == AgeGroups.PRESCHOOL:
+            # transition probability matrix of preschool children for intermittent therapy
+            self.probMatrix = data.PS_TRANS_MATRIX_INTERMITTENT
+            self.annualStateCosts = data.PS_HEALTH_COST_INTERMITTENT
+
+        else:
+            raise ValueError('No parameters for therapy {} and age group {}.'.format(self.therapy, self.ageGroup))
+
         # annual state costs and utilities
         self.annualStateUtilities = data.ANNUAL_STATE_UTILITY
 
@@ -0,0 +1,141 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # pure-Python fallback when numba is not installed
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+from asthma_cost_eval.input_data import HealthStates
+
+
+class ParameterTables:
+    """ parameters of several parameter sets stacked into arrays to be looked up by parameter-set index """
+
+    def __init__(self, parameter_sets):
+        """
+        :param parameter_sets: (list) parameter sets (instances of the parameters class)
+        """
+
+        self.cumProbMatrices = np.cumsum(
+            np.array([p.probMatrix for p in parameter_sets], dtype=float), axis=2)   # (sets, states, states)
+        self.stateCosts = np.array([p.annualStateCosts for p in parameter_sets], dtype=float)    # (sets, states)
+        self.stateUtilities = np.array([p.annualStateUtilities for p in parameter_sets], dtype=float)
+        self.treatmentCosts = np.array([p.annualTreatmentCost for p in parameter_sets], dtype=float)
+        self.discountRates = np.array([p.discountRate for p in parameter_sets], dtype=float)
+        self.initialStates = np.array([p.initialHealthState.value for p in parameter_sets], dtype=np.int64)
+
+
+def simulate_batch(tables, groups, n_time_steps, rng, if_record_paths=False):
+    """ simulates a batch of patients with the compiled kernel; patient j of every row of 'groups'
+    uses the same random numbers (common random numbers)
+    :param tables: ParameterTables of the parameter sets
+    :param groups: (int array) index of the parameter set of each patient, e.g. of shape (n_strategies, pop_size)
+    :param n_time_steps: number of time steps to simulate
+    :param rng: random number generator
+    :param if_record_paths: set to True to return the state of each patient at the end of each time step
+    :return: (tuple) times to asthma (nan if no exacerbation), discounted costs and discounted utilities
+             (each of the shape of groups), the number of patients in each state at the end of each time step
+             (of shape groups.shape[:-1] + (n_time_steps, n_states)) and the state paths
+             (of shape groups.shape + (n_time_steps, ), or None if not recorded)
+    """
+
+    groups = np.asarray(groups, dtype=np.int64)
+    n_rows = int(np.prod(groups.shape[:-1]))
+    n_columns = groups.shape[-1]
+    n_states = tables.cumProbMatrices.shape[1]
+
+    # patients of the same column share a row of random numbers and
+    # patients of the same row share an occupancy accumulator
+    uniforms = rng.random_sample(size=(n_columns, n_time_steps))
+    uniform_rows = np.tile(np.arange(n_columns), n_rows)
+    occupancy_indices = np.repeat(np.arange(n_rows), n_columns)
+
+    times_to_asthma = np.empty(groups.size)
+    costs = np.empty(groups.size)
+    utilities = np.empty(groups.size)
+    # state paths are only allocated if they are returned
+    state_paths = np.empty((groups.size, n_time_steps) if if_record_paths else (0, 0), dtype=np.uint8)
+    occupancy_counts = np.zeros((n_rows, n_time_steps, n_states), dtype=np.int64)
+
+    simulate_patients(tables.cumProbMatrices, tables.stateCosts, tables.stateUtilities, tables.treatmentCosts,
+                      tables.discountRates, tables.initialStates, HealthStates.ASTHMA.value,
+                      groups.reshape(-1), uniforms, uniform_rows, occupancy_indices,
+                      times_to_asthma, costs, utilities, state_paths, occupancy_counts)
+
+    return (times_to_asthma.reshape(groups.shape),
+            costs.reshape(groups.shape),
+            utilities.reshape(groups.shape),
+            occupancy_counts.reshape(groups.shape[:-1] + (n_time_steps, n_states)),
+            state_paths.reshape(groups.shape + (n_time_steps, )) if if_record_paths else None)
+
+
+@njit(cache=True)
+def simulate_patients(cum_prob_matrices, state_costs, state_utilities, treatment_costs, discount_rates,
+                      initial_states, asthma_state, groups, uniforms, uniform_rows, occupancy_indices,
+                      times_to_asthma, costs, utilities, state_paths, occupancy_counts):
+    """ simulates a batch of patients over flat arrays (compiled with numba if available)
+    :param cum_prob_matrices: (3d array) cumulative transition probabilities of each row of each parameter set
+    :param state_costs: (2d array) cost of each state per time step of each parameter set
+    :param state_utilities: (2d array) utility of each state per time step of each parameter set
+    :param treatment_costs: (1d array) cost of treatment per time step of each parameter set
+    :param discount_rates: (1d array) discount rate per time step of each parameter set
+    :param initial_states: (1d array) index of the initial state of each parameter set
+    :param asthma_state: index of the asthma state
+    :param groups: (1d array) index of the parameter set of each patient
+    :param uniforms: (2d array) rows of uniform random numbers of shape (n_rows, n_time_steps)
+    :param uniform_rows: (1d array) row of uniforms used by each patient
+    :param occupancy_indices: (1d array) index of the occupancy accumulator of each patient
+    :param times_to_asthma: (1d output array) time to asthma of each patient (nan if no exacerbation)
+    :param costs: (1d output array) discounted cost of each patient
+    :param utilities: (1d output array) discounted utility of each patient
+    :param state_paths: (2d output array) state of each patient at the end of each time step
+                        (an empty array of shape (0, 0) to not record the paths)
+    :param occupancy_counts: (3d array of shape (n_accumulators, n_time_steps, n_states)) number of patients in
+                             each state at the end of each time step, incremented in place
+    """
+
+    n_patients = groups.shape[0]
+    n_time_steps = uniforms.shape[1]
+    n_states = cum_prob_matrices.shape[1]
+    if_record_paths = state_paths.shape[0] > 0
+
+    for i in range(n_patients):
+
+        group = groups[i]
+        row = uniform_rows[i]
+        accumulator = occupancy_indices[i]
+
+        state = initial_states[group]
+        half_cycle_discount = 1 / (1 + discount_rates[group] / 2)
+        time_to_asthma = np.nan
+        cost = 0.0
+        utility = 0.0
+
+        for k in range(n_time_steps):
+            # sample the new state by inverting the cumulative probabilities
+            new_state = 0
+            while new_state < n_states - 1 and uniforms[row, k] >= cum_prob_matrices[group, state, new_state]:
+                new_state += 1
+
+            # update time until asthma
+            if state != asthma_state and new_state == asthma_state:
+                time_to_asthma = k + 0.5  # corrected for the half-cycle effect
+
+            # update cost and utility (corrected for the half-cycle effect)
+            discount = half_cycle_discount ** (2 * k + 1)
+            cost += (0.5 * (state_costs[group, state] + state_costs[group, new_state])
+                     + treatment_costs[group]) * discount
+            utility += 0.5 * (state_utilities[group, state] + state_utilities[group, new_state]) * discount
+
+            if if_record_paths:
+                state_paths[i, k] = new_state
+            occupancy_counts[accumulator, k, new_state] += 1
+            state = new_state
+
+        times_to_asthma[i] = time_to_asthma
+        costs[i] = cost
+        utilities[i] = utility
@@ -0,0 +1,150 @@
+import copy
+import csv
+
+import numpy as np
+
+import asthma_cost_eval.input_data as data
+from asthma_cost_eval.model_classes import CohortOutcomes
+from asthma_cost_eval.param_classes import AgeGroups, Parameters
+from asthma_cost_eval.patient_kernel import ParameterTables, simulate_batch
+from asthma_cost_eval.prevalence_classes import StateOccupancy
+from asthma_cost_eval.rare_event_classes import get_tilted_prob_matrix
+
+
+class PatientAttributes:
+    """ attributes of the patients of a heterogeneous population """
+
+    def __init__(self, risk_multipliers, age_groups, adherences):
+        """
+        :param risk_multipliers: (array) multiplier of the baseline exacerbation risk of each patient
+        :param age_groups: (array) age group (AgeGroups value) of each patient
+        :param adherences: (array) adherence (between 0 and 1) of each patient to the therapy
+        """
+
+        self.riskMultipliers = np.asarray(risk_multipliers, dtype=float)
+        self.ageGroups = np.asarray(age_groups, dtype=int)
+        self.adherences = np.asarray(adherences, dtype=float)
+
+    def get_size(self):
+        return len(self.riskMultipliers)
+
+
+def sample_patient_attributes(n, rng):
+    """ samples patient attributes from the distributions specified in input_data
+    :param n: number of patients
+    :param rng: random number generator
+    :return: PatientAttributes
+    """
+
+    # gamma distribution of the risk multiplier with the specified mean and standard deviation
+    shape = (data.RISK_MULTIPLIER_MEAN / data.RISK_MULTIPLIER_ST_DEV) ** 2
+    scale = data.RISK_MULTIPLIER_ST_DEV ** 2 / data.RISK_MULTIPLIER_MEAN
+
+    return PatientAttributes(
+        risk_multipliers=rng.gamma(shape, scale, size=n),
+        age_groups=np.where(rng.random_sample(size=n) < data.PRESCHOOL_SHARE,
+                            AgeGroups.PRESCHOOL.value, AgeGroups.SCHOOL.value),
+        adherences=rng.beta(data.ADHERENCE_BETA_A, data.ADHERENCE_BETA_B, size=n))
+
+
+def read_patient_attributes(file_name):
+    """ reads patient attributes from a csv file with columns risk_multiplier, age_group (SCHOOL or PRESCHOOL)
+    and adherence
+    :param file_name: name of the csv file
+    :return: PatientAttributes
+    """
+
+    risk_multipliers, age_groups, adherences = [], [], []
+    with open(file_name, newline='') as file:
+        for row in csv.DictReader(file):
+            risk_multipliers.append(float(row['risk_multiplier']))
+            age_groups.append(AgeGroups[row['age_group'].strip().upper()].value)
+            adherences.append(float(row['adherence']))
+
+    return PatientAttributes(risk_multipliers=risk_multipliers, age_groups=age_groups, adherences=adherences)
+
+
+class HeterogeneousCohort:
+    """ cohort of patients with individual risk multipliers, age groups and adherence; patients are binned into
+    profiles whose parameters are precomputed in lookup tables and simulated with the compiled kernel """
+
+    def __init__(self, id, therapy, patient_attributes, chunk_size=100000):
+        """
+        :param id: cohort ID (used as the seed of the random number generator)
+        :param therapy: selected therapy
+        :param patient_attributes: PatientAttributes of the patients of this cohort
+        :param chunk_size: number of patients simulated as one batch
+        """
+
+        self.id = id
+        self.therapy = therapy
+        self.attributes = patient_attributes
+        self.popSize = patient_attributes.get_size()
+        self.chunkSize = chunk_size
+        self.cohortOutcomes = CohortOutcomes()  # outcomes of this simulated cohort
+        self.stateOccupancy = None  # number of patients in each state at each time step
+
+        self.profileIndices = None  # index of the profile of each patient
+        self.profileParams = []     # parameter set of each profile
+
+    def _build_profiles(self):
+        """ bins the patients into profiles and creates the parameter set of each profile """
+
+        # bin risk multipliers by quantiles and adherence by equal widths
+        risk_edges = np.quantile(self.attributes.riskMultipliers, np.linspace(0, 1, data.N_RISK_BINS + 1)[1:-1])
+        risk_bins = np.digitize(self.attributes.riskMultipliers, risk_edges)
+        adherence_bins = np.minimum(
+            (self.attributes.adherences * data.N_ADHERENCE_BINS).astype(int), data.N_ADHERENCE_BINS - 1)
+
+        # representative (mean) value of each bin
+        risk_values = _get_bin_means(self.attributes.riskMultipliers, risk_bins, data.N_RISK_BINS)
+        adherence_values = _get_bin_means(self.attributes.adherences, adherence_bins, data.N_ADHERENCE_BINS)
+
+        self.profileIndices = (self.attributes.ageGroups * data.N_RISK_BINS + risk_bins) * data.N_ADHERENCE_BINS \
+            + adherence_bins
+
+        self.profileParams = []
+        for age_group in AgeGroups:
+            base_params = Parameters(therapy=self.therapy, age_group=age_group)
+            max_prob_asthma = max(row[data.HealthStates.ASTHMA.value] for row in base_params.probMatrix)
+            for risk in risk_values:
+                for adherence in adherence_values:
+                    params = copy.copy(base_params)
+                    # non-adherence increases the exacerbation risk
+                    tilt = risk * (1 + data.NON_ADHERENCE_RISK_INCREASE * (1 - adherence))
+                    params.probMatrix = get_tilted_prob_matrix(
+                        prob_matrix=base_params.probMatrix, tilt=min(tilt, 0.99 / max_prob_asthma))
+                    # the cost of the daily doses is only paid for the doses taken
+                    params.annualStateCosts = [
+                        cost - (1 - adherence) * dose_cost
+                        for cost, dose_cost in zip(base_params.annualStateCosts, base_params.annualStateDoseCosts)]
+                    self.profileParams.append(params)
+
+    def simulate(self, n_time_steps):
+        """ simulate the cohort of patients over the specified number of time-steps
+        :param n_time_steps: number of time steps to simulate the cohort
+        """
+
+        self._build_profiles()
+        tables = ParameterTables(parameter_sets=self.profileParams)
+
+        rng = np.random.RandomState(seed=self.id)
+        self.stateOccupancy = StateOccupancy(n_time_steps=n_time_steps)
+
+        for start in range(0, self.popSize, self.chunkSize):
+            times_to_asthma, costs, utilities, occupancy_counts, _ = simulate_batch(
+                tables=tables, groups=self.profileIndices[start:start + self.chunkSize],
+                n_time_steps=n_time_steps, rng=rng)
+
+            self.cohortOutcomes.extract_outcomes(times_to_asthma=times_to_asthma, costs=costs, utilities=utilities)
+            self.stateOccupancy.counts += occupancy_counts
+
+        # calculate cohort outcomes
+        self.cohortOutcomes.calculate_cohort_outcomes()
+
+
+def _get_bin_means(values, bins, n_bins):
+    """ :return: (array) mean of the values in each bin (0 for empty bins) """
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.bincount(bins, weights=values, minlength=n_bins)
+    return np.divide(sums, counts, out=np.zeros(n_bins), where=counts > 0)
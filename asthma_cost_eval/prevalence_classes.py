@@ -0,0 +1,146 @@
+import csv
+from statistics import NormalDist
+
+import numpy as np
+
+from asthma_cost_eval.input_data import HealthStates
+
+
+class StateOccupancy:
+    """ accumulates the number of patients in each health state at each time step
+    (row k is the occupancy at the end of time step k) without storing patients' paths """
+
+    def __init__(self, n_time_steps, n_states=len(HealthStates), if_weighted=False):
+        """
+        :param n_time_steps: number of simulation time steps
+        :param n_states: number of health states
+        :param if_weighted: set to True to accumulate (importance sampling) weights of patients instead of counts;
+                            the prevalence is then the self-normalized weighted prevalence
+        """
+
+        self.ifWeighted = if_weighted
+        self.counts = np.zeros((n_time_steps, n_states), dtype=float if if_weighted else np.int64)
+        # sum of squared weights of patients in each state at each time step (for the standard errors)
+        self.squaredWeights = np.zeros((n_time_steps, n_states)) if if_weighted else None
+
+    def record(self, time_step, state_index):
+        """ records one patient in the given state at the given time step """
+        self.counts[time_step, state_index] += 1
+
+    def record_path(self, state_path, weight=1):
+        """ records the state of one patient at every time step
+        :param state_path: (list) state index of the patient at the end of each time step
+        :param weight: weight of the patient (only for weighted occupancy)
+        """
+        self.counts[np.arange(len(state_path)), state_path] += weight
+        if self.ifWeighted:
+            self.squaredWeights[np.arange(len(state_path)), state_path] += weight ** 2
+
+    def merge(self, other):
+        """ adds the counts of another accumulator (e.g. from another worker) to this one
+        :param other: a StateOccupancy with the same dimensions
+        """
+        if self.counts.shape != other.counts.shape:
+            raise ValueError('Cannot merge state occupancies of shapes {} and {}.'.format(
+                self.counts.shape, other.counts.shape))
+        self.counts += other.counts
+        if self.ifWeighted:
+            self.squaredWeights += other.squaredWeights
+
+    def get_n_patients(self):
+        """ :return: number of patients (sum of weights for weighted occupancy) """
+        return self.counts[0].sum() if len(self.counts) > 0 else 0
+
+    def get_prevalence(self):
+        """ :return: (2d array) proportion of patients in each state at each time step """
+        totals = self.counts.sum(axis=1, keepdims=True)
+        return np.divide(self.counts, totals, out=np.zeros(self.counts.shape), where=totals > 0)
+
+    def get_st_errors(self):
+        """ :return: (2d array) standard error of the prevalence of each state at each time step
+        (binomial for counts, delta-method of the ratio estimator for weighted occupancy) """
+
+        prevalence = self.get_prevalence()
+
+        if not self.ifWeighted:
+            return np.sqrt(prevalence * (1 - prevalence) / max(self.get_n_patients(), 1))
+
+        # sum of w^2 (1[state] - prevalence)^2 over patients, divided by the squared sum of weights
+        totals = self.counts.sum(axis=1, keepdims=True)
+        squared_totals = self.squaredWeights.sum(axis=1, keepdims=True)
+        variance_sums = self.squaredWeights * (1 - prevalence) ** 2 \
+            + (squared_totals - self.squaredWeights) * prevalence ** 2
+        return np.sqrt(np.divide(variance_sums, totals ** 2, out=np.zeros(self.counts.shape), where=totals > 0))
+
+    def get_intervals(self, alpha):
+        """
+        :param alpha: significance level
+        :return: (tuple) lower and upper (normal-approximation) confidence bounds of the prevalence
+        """
+
+        prevalence = self.get_prevalence()
+        half_length = NormalDist().inv_cdf(1 - alpha / 2) * self.get_st_errors()
+
+        return np.clip(prevalence - half_length, 0, 1), np.clip(prevalence + half_length, 0, 1)
+
+    def export_csv(self, file_name, alpha):
+        """ writes the prevalence curves and their confidence intervals to a csv file
+        :param file_name: name of the csv file
+        :param alpha: significance level
+        """
+
+        write_prevalence_csv(file_name=file_name, prevalence=self.get_prevalence(),
+                             intervals=self.get_intervals(alpha=alpha))
+
+
+class MultiCohortOccupancy:
+    """ prevalence curves of cohorts simulated under different parameter values """
+
+    def __init__(self):
+        self.prevalences = []   # list of prevalence arrays (n_time_steps, n_states) of each cohort
+
+    def extract_occupancy(self, state_occupancy):
+        """ :param state_occupancy: the StateOccupancy of a simulated cohort """
+        self.prevalences.append(state_occupancy.get_prevalence())
+
+    def get_mean_prevalence(self):
+        return np.mean(self.prevalences, axis=0)
+
+    def get_intervals(self, alpha):
+        """
+        :param alpha: significance level
+        :return: (tuple) lower and upper percentiles of the prevalence across cohorts (uncertainty interval)
+        """
+        return (np.percentile(self.prevalences, 100 * alpha / 2, axis=0),
+                np.percentile(self.prevalences, 100 * (1 - alpha / 2), axis=0))
+
+    def export_csv(self, file_name, alpha):
+        """ writes the mean prevalence curves and their uncertainty intervals to a csv file
+        :param file_name: name of the csv file
+        :param alpha: significance level
+        """
+
+        write_prevalence_csv(file_name=file_name, prevalence=self.get_mean_prevalence(),
+                             intervals=self.get_intervals(alpha=alpha))
+
+
+def write_prevalence_csv(file_name, prevalence, intervals):
+    """ writes prevalence curves to a csv file with one row per time step
+    :param file_name: name of the csv file
+    :param prevalence: (2d array) prevalence of each state at each time step
+    :param intervals: (tuple) lower and upper bounds of the prevalence
+    """
+
+    with open(file_name, 'w', newline='') as file:
+        writer = csv.writer(file)
+
+        header = ['Time step']
+        for state in HealthStates:
+            header.extend([state.name, state.name + ' lower', state.name + ' upper'])
+        writer.writerow(header)
+
+        for k in range(len(prevalence)):
+            row = [k + 1]
+            for s in range(len(HealthStates)):
+                row.extend([prevalence[k, s], intervals[0][k, s], intervals[1][k, s]])
+            writer.writerow(row)
@@ -1,8 +1,11 @@
+import numpy as np
+
 import deampy.econ_eval as econ
 import deampy.statistics as stat
 
 
 import asthma_cost_eval.input_data as data
+from asthma_cost_eval.bootstrap_classes import BootstrapCEA
 
 
 def print_outcomes(sim_outcomes, therapy_name):
@@ -35,6 +38,42 @@ def print_outcomes(sim_outcomes, therapy_name):
 
 
 
+def print_rare_event_outcomes(sim_outcomes, therapy_name):
+    """ prints the importance sampling estimates of a cohort simulated with ImportanceSamplingCohort
+    :param sim_outcomes: outcomes of an importance-sampled cohort
+    :param therapy_name: the name of the selected therapy
+    """
+
+    # mean and confidence interval text of time to asthma
+    time_to_asthma_CI_text = sim_outcomes.statTimeToAsthma.get_formatted_mean_and_interval(
+        interval_type='c', alpha=data.ALPHA, deci=2)
+
+    # mean and confidence interval text of the probability of asthma exacerbation
+    prob_asthma_CI_text = sim_outcomes.statProbAsthma.get_formatted_mean_and_interval(
+        interval_type='c', alpha=data.ALPHA, deci=3)
+
+    # mean and confidence interval text of discounted cost in the asthma state
+    asthma_cost_CI_text = sim_outcomes.statAsthmaCost.get_formatted_mean_and_interval(
+        interval_type='c', alpha=data.ALPHA, deci=0, form=',')
+
+    # mean and confidence interval text of weeks in the asthma state
+    asthma_weeks_CI_text = sim_outcomes.statAsthmaWeeks.get_formatted_mean_and_interval(
+        interval_type='c', alpha=data.ALPHA, deci=3)
+
+    # print outcomes
+    print(therapy_name, '(importance sampling)')
+    print("  Estimate of mean time to Asthma and {:.{prec}%} confidence interval:".format(1 - data.ALPHA, prec=0),
+          time_to_asthma_CI_text)
+    print("  Estimate of probability of Asthma and {:.{prec}%} confidence interval:".format(1 - data.ALPHA, prec=0),
+          prob_asthma_CI_text)
+    print("  Estimate of discounted cost of Asthma and {:.{prec}%} confidence interval:".format(
+        1 - data.ALPHA, prec=0), asthma_cost_CI_text)
+    print("  Estimate of weeks in Asthma and {:.{prec}%} confidence interval:".format(1 - data.ALPHA, prec=0),
+          asthma_weeks_CI_text)
+    print("  Effective sample size:", round(sim_outcomes.statCost.get_effective_sample_size()))
+    print("")
+
+
 def print_comparative_outcomes(sim_outcomes_daily, sim_outcomes_inter):
     """ prints average increase in survival time, discounted cost, and discounted utility
     under intermittent therapy compared to daily therapy
@@ -67,31 +106,69 @@ def print_comparative_outcomes(sim_outcomes_daily, sim_outcomes_inter):
           .format(1 - data.ALPHA, prec=0), estimate_CI)
 
 
-def report_CEA_CBA(sim_outcomes_daily, sim_outcomes_inter):
-    """ performs cost-effectiveness and cost-benefit analyses
+def print_bootstrap_intervals(sim_outcomes_daily, sim_outcomes_inter, wtp_values=(0, 25000, 50000, 100000),
+                              n_workers=None):
+    """ prints bootstrap confidence intervals of the ICER and the incremental net monetary benefit
+    of intermittent therapy with respect to daily therapy
     :param sim_outcomes_daily: outcomes of a cohort simulated under daily therapy
     :param sim_outcomes_inter: outcomes of a cohort simulated under intermittent therapy
+    :param wtp_values: willingness-to-pay values to report the net monetary benefit at
+    :param n_workers: number of processes to draw the bootstrap resamples; if None, data.N_WORKERS processes
+                      are used for inputs larger than data.MIN_PARALLEL_BOOTSTRAP_SIZE and one otherwise
+                      (callers using processes should be guarded by if __name__ == '__main__')
     """
 
-    # define two strategies
-    daily_therapy_strategy = econ.Strategy(
-        name='Daily Therapy',
-        cost_obs=sim_outcomes_daily.costs,
-        effect_obs=sim_outcomes_daily.utilities,
-        color='green'
-    )
-    inter_therapy_strategy = econ.Strategy(
-        name='Intermittent Therapy',
-        cost_obs=sim_outcomes_inter.costs,
-        effect_obs=sim_outcomes_inter.utilities,
-        color='blue'
-    )
+    if n_workers is None:
+        n_observations = len(sim_outcomes_daily.costs) + len(sim_outcomes_inter.costs)
+        n_workers = data.N_WORKERS if data.N_BOOTSTRAP * n_observations >= data.MIN_PARALLEL_BOOTSTRAP_SIZE else 1
+
+    bootstrap = BootstrapCEA(
+        costs_base=sim_outcomes_daily.costs,
+        effects_base=sim_outcomes_daily.utilities,
+        costs_new=sim_outcomes_inter.costs,
+        effects_new=sim_outcomes_inter.utilities,
+        n_resamples=data.N_BOOTSTRAP,
+        n_workers=n_workers)
+
+    icer_interval = bootstrap.get_ICER_interval(alpha=data.ALPHA)
+    if np.isnan(icer_interval[0]):
+        print("ICER: {:,.2f}; the bootstrap confidence interval is undefined because the incremental".format(
+            bootstrap.get_ICER()), "effect changes sign across resamples (see the net monetary benefit intervals)")
+    else:
+        print("ICER and {:.{prec}%} bootstrap confidence interval:".format(1 - data.ALPHA, prec=0),
+              "{:,.2f} ({:,.2f}, {:,.2f})".format(bootstrap.get_ICER(), icer_interval[0], icer_interval[1]))
+
+    estimates, lowers, uppers = bootstrap.get_NMB_intervals(wtp_values=wtp_values, alpha=data.ALPHA)
+    for wtp, estimate, lower, upper in zip(wtp_values, estimates, lowers, uppers):
+        print("Incremental net monetary benefit at WTP of ${:,} and {:.{prec}%} bootstrap confidence interval:"
+              .format(wtp, 1 - data.ALPHA, prec=0), "{:,.2f} ({:,.2f}, {:,.2f})".format(estimate, lower, upper))
+
+
+def report_CEA_CBA_strategies(names, sim_outcomes, if_paired=True, file_suffix='_strategies'):
+    """ performs cost-effectiveness and cost-benefit analyses of any number of strategies
+    :param names: (list) names of the strategies (the first one is the 'Base' strategy)
+    :param sim_outcomes: (list) outcomes of the cohort simulated under each strategy
+    :param if_paired: set to True if the strategies are simulated with common random numbers
+    :param file_suffix: suffix of the names of the figure and table files
+    """
+
+    colors = ['green', 'blue', 'red', 'orange', 'purple', 'brown', 'pink', 'gray', 'olive', 'cyan']
+
+    # define strategies
+    strategies = []
+    for i, (name, outcomes) in enumerate(zip(names, sim_outcomes)):
+        strategies.append(econ.Strategy(
+            name=name,
+            cost_obs=outcomes.costs,
+            effect_obs=outcomes.utilities,
+            color=colors[i % len(colors)]
+        ))
 
     # do CEA
     # (the first strategy in the list of strategies is assumed to be the 'Base' strategy)
     CEA = econ.CEA(
-        strategies=[daily_therapy_strategy, inter_therapy_strategy],
-        if_paired=False
+        strategies=strategies,
+        if_paired=if_paired
     )
 
     # plot cost-effectiveness figure
@@ -100,7 +177,7 @@ def report_CEA_CBA(sim_outcomes_daily, sim_outcomes_inter):
         x_label='Additional QALYs',
         y_label='Additional Cost',
         interval_type='c',  # to show confidence intervals for cost and effect of each strategy
-        file_name='figs/cea.png'
+        file_name='figs/cea{}.png'.format(file_suffix)
     )
 
     # report the CE table
@@ -110,13 +187,13 @@ def report_CEA_CBA(sim_outcomes_daily, sim_outcomes_inter):
         cost_digits=0,
         effect_digits=2,
         icer_digits=2,
-        file_name='CETable.csv')
+        file_name='CETable{}.csv'.format(file_suffix))
 
     # CBA
     CBA = econ.CBA(
-        strategies=[daily_therapy_strategy, inter_therapy_strategy],
+        strategies=strategies,
         wtp_range=[0, 100000],
-        if_paired=False
+        if_paired=if_paired
     )
     # show the net monetary benefit figure
     CBA.plot_marginal_nmb_lines(
@@ -126,5 +203,18 @@ def report_CEA_CBA(sim_outcomes_daily, sim_outcomes_inter):
         interval_type='c',
         show_legend=True,
         figure_size=(6, 5),
-        file_name='figs/nmb.png'
+        file_name='figs/nmb{}.png'.format(file_suffix)
     )
+
+
+def report_CEA_CBA(sim_outcomes_daily, sim_outcomes_inter):
+    """ performs cost-effectiveness and cost-benefit analyses
+    :param sim_outcomes_daily: outcomes of a cohort simulated under daily therapy
+    :param sim_outcomes_inter: outcomes of a cohort simulated under intermittent therapy
+    """
+
+    # the two cohorts are simulated independently
+    report_CEA_CBA_strategies(names=['Daily Therapy', 'Intermittent Therapy'],
+                              sim_outcomes=[sim_outcomes_daily, sim_outcomes_inter],
+                              if_paired=False,
+                              file_suffix='')
@@ -0,0 +1,191 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import asthma_cost_eval.input_data as data
+
+
+def evaluate_prob_matrices(prob_matrices, n_time_steps, initial_state=data.HealthStates.WELL,
+                           n_time_steps_to_asthma=data.SIM_TIME_STEPS):
+    """ calculates the expected outcomes of a batch of candidate transition probability matrices
+    with batched matrix products (without simulating patients)
+    :param prob_matrices: (array) candidate transition probability matrices of shape (n_candidates, n_states, n_states)
+    :param n_time_steps: number of time steps of the prevalence
+    :param initial_state: initial health state
+    :param n_time_steps_to_asthma: simulation length over which the time to asthma is calculated
+    :return: (tuple) prevalence of each state at the end of each time step (n_candidates, n_time_steps, n_states),
+             mean time to asthma among patients with an exacerbation and the probability of an exacerbation
+             over n_time_steps_to_asthma (n_candidates, ); as in PatientStateMonitor, the time to asthma
+             of a patient is the time of the last entry into the asthma state (corrected for the
+             half-cycle effect)
+    """
+
+    prob_matrices = np.asarray(prob_matrices, dtype=float)
+    n_candidates, n_states, _ = prob_matrices.shape
+    asthma = data.HealthStates.ASTHMA.value
+
+    state_probs = np.zeros((n_candidates, n_states))
+    state_probs[:, initial_state.value] = 1
+
+    prevalence = np.zeros((n_candidates, n_time_steps, n_states))
+    for k in range(n_time_steps):
+        state_probs = np.einsum('bi,bij->bj', state_probs, prob_matrices)
+        prevalence[:, k, :] = state_probs
+
+    # same chain without transitions into asthma from the other states
+    no_onset_matrices = prob_matrices.copy()
+    no_onset_matrices[:, :, asthma] = 0
+    no_onset_matrices[:, asthma, asthma] = prob_matrices[:, asthma, asthma]
+
+    # probability of no entry into asthma after time step k for patients in asthma at the end of step k
+    # (calculated backwards from the end of the simulation)
+    probs_no_later_onset = np.zeros((n_candidates, n_time_steps_to_asthma))
+    probs_no_onset = np.ones((n_candidates, n_states))
+    for k in reversed(range(n_time_steps_to_asthma)):
+        probs_no_later_onset[:, k] = probs_no_onset[:, asthma]
+        probs_no_onset = np.einsum('bij,bj->bi', no_onset_matrices, probs_no_onset)
+
+    # probability that the last entry into asthma is during time step k
+    state_probs = np.zeros((n_candidates, n_states))
+    state_probs[:, initial_state.value] = 1
+    sum_of_times = np.zeros(n_candidates)
+    prob_asthma = np.zeros(n_candidates)
+    for k in range(n_time_steps_to_asthma):
+        prob_onset = np.einsum('bi,bi->b', np.delete(state_probs, asthma, axis=1),
+                               np.delete(prob_matrices[:, :, asthma], asthma, axis=1))
+        prob_last_onset = prob_onset * probs_no_later_onset[:, k]
+        sum_of_times += (k + 0.5) * prob_last_onset
+        prob_asthma += prob_last_onset
+        state_probs = np.einsum('bi,bij->bj', state_probs, prob_matrices)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_time_to_asthma = sum_of_times / prob_asthma
+
+    return prevalence, mean_time_to_asthma, prob_asthma
+
+
+class CalibrationTargets:
+    """ observed statistics to calibrate the transition probability matrix against """
+
+    def __init__(self):
+
+        self.prevalenceTargets = []     # list of (week, state, observed prevalence, standard deviation)
+        self.timeToAsthmaTarget = None  # (observed mean time to last exacerbation, standard deviation)
+
+    def add_prevalence(self, week, state, value, st_dev):
+        """
+        :param week: week at the end of which the prevalence is observed (1, 2, ...)
+        :param state: health state
+        :param value: observed proportion of patients in the state
+        :param st_dev: standard deviation (uncertainty) of the observed proportion
+        """
+        self.prevalenceTargets.append((week, state, value, st_dev))
+
+    def set_time_to_asthma(self, value, st_dev):
+        """ the model records the time of the last exacerbation of each patient over the simulation length
+        (data.SIM_TIME_STEPS), so the target is compared with this statistic and not with the time to
+        the first exacerbation
+        :param value: observed mean time (weeks) to the last asthma exacerbation (within data.SIM_TIME_STEPS
+                      weeks) among patients with at least one
+        :param st_dev: standard deviation (uncertainty) of the observed mean
+        """
+        self.timeToAsthmaTarget = (value, st_dev)
+
+    def get_n_time_steps(self):
+        """ :return: number of weeks needed to evaluate the targets """
+        weeks = [target[0] for target in self.prevalenceTargets]
+        return max(weeks + [data.SIM_TIME_STEPS])
+
+    def get_distances(self, prevalence, mean_time_to_asthma):
+        """
+        :param prevalence: (n_candidates, n_time_steps, n_states) prevalence of candidates
+        :param mean_time_to_asthma: (n_candidates, ) mean time to (last) asthma of candidates
+        :return: (array) sum of squared standardized errors of each candidate
+        """
+
+        distances = np.zeros(len(prevalence))
+        for week, state, value, st_dev in self.prevalenceTargets:
+            distances += ((prevalence[:, week - 1, state.value] - value) / st_dev) ** 2
+
+        if self.timeToAsthmaTarget is not None:
+            value, st_dev = self.timeToAsthmaTarget
+            distances += ((mean_time_to_asthma - value) / st_dev) ** 2
+
+        # candidates that cannot be evaluated are never accepted
+        distances[np.isnan(distances)] = np.inf
+
+        return distances
+
+
+class ABCCalibration:
+    """ approximate Bayesian computation (rejection) sampler of row-stochastic transition probability matrices """
+
+    def __init__(self, targets, prob_matrix, concentration=100):
+        """
+        :param targets: CalibrationTargets
+        :param prob_matrix: prior mean of the transition probability matrix (e.g. from input_data)
+        :param concentration: concentration of the Dirichlet prior of each row around the prior mean
+        """
+
+        self.targets = targets
+        self.priorAlphas = concentration * np.asarray(prob_matrix, dtype=float)
+        self.posteriorDraws = None      # accepted transition probability matrices (in random order)
+        self.distances = None           # distances of the accepted matrices
+        self.calibratedProbMatrix = None    # posterior mean of the transition probability matrix
+
+    def sample_prior(self, n_candidates, rng):
+        """
+        :return: (array) candidate matrices of shape (n_candidates, n_states, n_states)
+        """
+        return np.stack([rng.dirichlet(alphas, size=n_candidates) for alphas in self.priorAlphas], axis=1)
+
+    def run(self, n_candidates=100000, n_accepted=1000, batch_size=10000, seed=0, n_workers=1):
+        """ samples candidates from the prior and keeps the n_accepted closest to the targets
+        :param n_candidates: number of candidate matrices to evaluate
+        :param n_accepted: number of posterior draws to keep
+        :param batch_size: number of candidates evaluated as one batch
+        :param seed: seed of the random number generators (results do not depend on n_workers)
+        :param n_workers: number of threads to evaluate the batches
+        """
+
+        n_time_steps = self.targets.get_n_time_steps()
+        batch_sizes = [min(batch_size, n_candidates - start) for start in range(0, n_candidates, batch_size)]
+        seed_sequences = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+
+        def evaluate(i):
+            rng = np.random.default_rng(seed_sequences[i])
+            candidates = self.sample_prior(n_candidates=batch_sizes[i], rng=rng)
+            prevalence, mean_time_to_asthma, _ = evaluate_prob_matrices(
+                prob_matrices=candidates, n_time_steps=n_time_steps)
+            distances = self.targets.get_distances(prevalence=prevalence, mean_time_to_asthma=mean_time_to_asthma)
+
+            # only keep the best candidates of each batch to bound memory
+            best = np.argsort(distances, kind='stable')[:n_accepted]
+            return candidates[best], distances[best]
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(evaluate, range(len(batch_sizes))))
+
+        candidates = np.concatenate([result[0] for result in results])
+        distances = np.concatenate([result[1] for result in results])
+        best = np.argsort(distances, kind='stable')[:n_accepted]
+
+        # store the accepted draws in random order (not sorted by distance)
+        best = np.random.default_rng(seed).permutation(best)
+        self.posteriorDraws = candidates[best]
+        self.distances = distances[best]
+        self.calibratedProbMatrix = self.posteriorDraws.mean(axis=0)
+
+    def save(self, file_name):
+        """ saves the posterior draws (to be used by ParameterGenerator)
+        :param file_name: name of the file (.npy)
+        """
+        np.save(file_name, self.posteriorDraws)
+
+
+def load_posterior_draws(file_name):
+    """
+    :param file_name: name of the file saved by ABCCalibration.save
+    :return: (array) posterior draws of the transition probability matrix
+    """
+    return np.load(file_name)
@@ -1,31 +1,51 @@
+import hashlib
+
 import deampy.statistics as stat
+import numpy as np
 
 from asthma_cost_eval.model_classes import Cohort
+from asthma_cost_eval.prevalence_classes import MultiCohortOccupancy
 from asthma_param_uncertainity.param_classes import ParameterGenerator
 
 
 class MultiCohort:
     """ simulates multiple cohorts with different parameters """
 
-    def __init__(self, ids, pop_size, therapy):
+    def __init__(self, ids, pop_size, therapy, shard=None, prob_matrix_draws=None):
         """
         :param ids: (list) of ids for cohorts to simulate
         :param pop_size: (int) population size of cohorts to simulate
         :param therapy: selected therapy
+        :param shard: (optional) a string 'k/n' or a tuple (k, n) to only simulate the k-th of n shards of ids
+                      (k starts from 1); all ids are simulated if None
+        :param prob_matrix_draws: (optional) draws of the transition probability matrix (e.g. from calibration)
         """
         self.ids = ids
         self.popSize = pop_size
         self.therapy = therapy
+        self.shard = (1, 1) if shard is None else parse_shard(shard)
+        self.nTimeSteps = None
         self.paramSets = []  # list of parameter sets each of which corresponds to a cohort
         self.multiCohortOutcomes = MultiCohortOutcomes()
-        self.paramGenerator = ParameterGenerator(therapy=self.therapy)
+        self.paramGenerator = ParameterGenerator(therapy=self.therapy, prob_matrix_draws=prob_matrix_draws)
+
+    def get_shard_positions(self):
+        """
+        :return: (range) positions in ids of the cohorts that belong to this shard
+        """
+        shard_index, n_shards = self.shard
+        return range(shard_index - 1, len(self.ids), n_shards)
 
     def simulate(self, n_time_steps):
-        """ simulates all cohorts
+        """ simulates all cohorts of this shard
         :param n_time_steps: number of simulation time steps
         """
 
-        for i in range(len(self.ids)):
+        self.nTimeSteps = n_time_steps
+
+        # the parameter seed is the position of the cohort in ids so that the result
+        # does not depend on how ids are split into shards
+        for i in self.get_shard_positions():
 
             # get a new set of parameter values
             param_set = self.paramGenerator.get_new_parameters(seed=i)
@@ -40,17 +60,22 @@ class MultiCohort:
 
             # extract the outcomes of this simulated cohort
             self.multiCohortOutcomes.extract_outcomes(simulated_cohort=cohort)
+            self.multiCohortOutcomes.cohortPositions.append(i)
 
         # calculate the summary statistics of outcomes from all cohorts
-        self.multiCohortOutcomes.calculate_summary_stats()
+        # (a shard may have no cohorts when there are more shards than ids)
+        if len(self.multiCohortOutcomes.meanCosts) > 0:
+            self.multiCohortOutcomes.calculate_summary_stats()
 
 
 class MultiCohortOutcomes:
     def __init__(self):
 
+        self.cohortPositions = []     # position in ids of each simulated cohort
         self.meanTimeToAsthma = []     # list of average patient time until AIDS from each simulated cohort
         self.meanCosts = []          # list of average patient cost from each simulated cohort
         self.meanQALYs = []          # list of average patient QALY from each simulated cohort
+        self.occupancy = MultiCohortOccupancy()     # prevalence curves of each simulated cohort
 
         self.statMeanTimeToAsthma = None      # summary statistics of average time until AIDS
         self.statMeanCost = None            # summary statistics of average cost
@@ -67,6 +92,8 @@ class MultiCohortOutcomes:
         self.meanCosts.append(simulated_cohort.cohortOutcomes.statCost.get_mean())
         # store mean QALY from this cohort
         self.meanQALYs.append(simulated_cohort.cohortOutcomes.statUtility.get_mean())
+        # store prevalence curves from this cohort
+        self.occupancy.extract_occupancy(state_occupancy=simulated_cohort.stateOccupancy)
 
     def calculate_summary_stats(self):
         """
@@ -81,4 +108,98 @@ class MultiCohortOutcomes:
                                              data=self.meanCosts)
         # summary statistics of mean QALY
         self.statMeanQALY = stat.SummaryStat(name='Average QALY',
-                                             data=self.meanQALYs)
\ No newline at end of file
+                                             data=self.meanQALYs)
+
+
+def parse_shard(shard):
+    """
+    :param shard: a string 'k/n' (e.g. '3/16') or a tuple (k, n)
+    :return: (tuple) (k, n) where 1 <= k <= n
+    """
+
+    if isinstance(shard, str):
+        shard = shard.split('/')
+    shard_index, n_shards = int(shard[0]), int(shard[1])
+    if not 1 <= shard_index <= n_shards:
+        raise ValueError('Shard should be of the form k/n with 1 <= k <= n, got {}.'.format(shard))
+    return shard_index, n_shards
+
+
+def write_shard_file(simulated_multi_cohort, file_name):
+    """ writes the outcomes of a simulated (shard of a) multi-cohort to a self-describing file
+    :param simulated_multi_cohort: a multi-cohort after being simulated
+    :param file_name: name of the file (.npz) to write to
+    """
+
+    outcomes = simulated_multi_cohort.multiCohortOutcomes
+    np.savez(file_name,
+             therapy=simulated_multi_cohort.therapy.name,
+             ids=np.asarray(list(simulated_multi_cohort.ids)),
+             pop_size=simulated_multi_cohort.popSize,
+             n_time_steps=simulated_multi_cohort.nTimeSteps,
+             shard=np.asarray(simulated_multi_cohort.shard),
+             prob_matrix_draws_hash=get_draws_hash(simulated_multi_cohort.paramGenerator.probMatrixDraws),
+             positions=np.asarray(outcomes.cohortPositions, dtype=np.int64),
+             mean_time_to_asthma=np.asarray(outcomes.meanTimeToAsthma, dtype=np.float64),
+             mean_costs=np.asarray(outcomes.meanCosts, dtype=np.float64),
+             mean_qalys=np.asarray(outcomes.meanQALYs, dtype=np.float64),
+             prevalences=np.asarray(outcomes.occupancy.prevalences, dtype=np.float64))
+
+
+def merge_shard_files(file_names):
+    """ combines the shard files of a multi-cohort into one set of multi-cohort outcomes
+    :param file_names: (list) names of the shard files to merge
+    :return: a MultiCohortOutcomes identical to simulating all ids in a single process
+    """
+
+    description = None
+    positions, mean_times, mean_costs, mean_qalys, prevalences = [], [], [], [], []
+
+    for file_name in file_names:
+        with np.load(file_name) as shard:
+            # the shards must come from the same multi-cohort
+            this_description = (str(shard['therapy']), shard['ids'].tolist(),
+                                int(shard['pop_size']), int(shard['n_time_steps']),
+                                str(shard['prob_matrix_draws_hash']))
+            if description is None:
+                description = this_description
+            elif this_description != description:
+                raise ValueError('Shard file {} belongs to a different multi-cohort.'.format(file_name))
+
+            positions.extend(shard['positions'].tolist())
+            mean_times.extend(shard['mean_time_to_asthma'].tolist())
+            mean_costs.extend(shard['mean_costs'].tolist())
+            mean_qalys.extend(shard['mean_qalys'].tolist())
+            prevalences.extend(list(shard['prevalences']))
+
+    if description is None:
+        raise ValueError('No shard files to merge.')
+
+    # every cohort should be simulated exactly once
+    n_cohorts = len(description[1])
+    if sorted(positions) != list(range(n_cohorts)):
+        raise ValueError('Shard files do not cover each of the {} cohorts exactly once.'.format(n_cohorts))
+
+    # order cohorts as in a single-process run
+    multi_cohort_outcomes = MultiCohortOutcomes()
+    for i in np.argsort(positions):
+        multi_cohort_outcomes.cohortPositions.append(positions[i])
+        multi_cohort_outcomes.meanTimeToAsthma.append(mean_times[i])
+        multi_cohort_outcomes.meanCosts.append(mean_costs[i])
+        multi_cohort_outcomes.meanQALYs.append(mean_qalys[i])
+        multi_cohort_outcomes.occupancy.prevalences.append(prevalences[i])
+
+    multi_cohort_outcomes.calculate_summary_stats()
+
+    return multi_cohort_outcomes
+
+
+def get_draws_hash(prob_matrix_draws):
+    """
+    :param prob_matrix_draws: draws of the transition probability matrix (or None)
+    :return: (string) hash of the draws ('' if None) to check that shards used the same draws
+    """
+
+    if prob_matrix_draws is None:
+        return ''
+    return hashlib.sha256(np.ascontiguousarray(prob_matrix_draws, dtype=np.float64).tobytes()).hexdigest()
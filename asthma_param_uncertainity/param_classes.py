@@ -23,9 +23,16 @@ class Parameters:
 class ParameterGenerator:
     """ class to generate parameter values from the selected probability distributions """
 
-    def __init__(self, therapy):
+    def __init__(self, therapy, prob_matrix_draws=None):
+        """
+        :param therapy: selected therapy
+        :param prob_matrix_draws: (optional) draws of the transition probability matrix (e.g. posterior draws
+                                  from calibration) to sample from (with replacement) instead of the beta
+                                  distributions
+        """
 
         self.therapy = therapy
+        self.probMatrixDraws = prob_matrix_draws
         self.probMatrixRVG = []     # list of beta distributions for transition probabilities
         self.annualStateCostRVGs = []  # list of gamma distributions for the annual cost of states
         self.annualStateUtilityRVGs = []  # list of gamma distributions for the annual utility of states
@@ -101,12 +108,16 @@ class ParameterGenerator:
 
         # calculate transition probabilities
         prob_matrix = []  # probability matrix without background mortality added
-        # for all health states
-        for row in self.probMatrixRVG:
-            x = []
-            for dist in row:
-                x.append(dist.sample(rng))
-            prob_matrix.append(x)
+        if self.probMatrixDraws is not None:
+            # sample one of the given draws
+            prob_matrix = [list(row) for row in self.probMatrixDraws[rng.randint(len(self.probMatrixDraws))]]
+        else:
+            # for all health states
+            for row in self.probMatrixRVG:
+                x = []
+                for dist in row:
+                    x.append(dist.sample(rng))
+                prob_matrix.append(x)
 
         # Normalize each row so that the sum of each row equals 1
         for row in prob_matrix:
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import asthma_cost_eval.model_classes as model
+import asthma_cost_eval.param_classes as param
+
+POP_SIZE = 2000
+N_TIME_STEPS = 52
+MAX_Z = 4   # largest accepted difference between the backends (in standard errors)
+
+
+def simulate(therapy, backend):
+    cohort = model.Cohort(id=1, pop_size=POP_SIZE, parameters=param.Parameters(therapy=therapy), backend=backend)
+    cohort.simulate(n_time_steps=N_TIME_STEPS)
+    return cohort
+
+
+def assert_same_mean(observations_object, observations_kernel):
+    se = np.sqrt(np.var(observations_object, ddof=1) / len(observations_object)
+                 + np.var(observations_kernel, ddof=1) / len(observations_kernel))
+    assert abs(np.mean(observations_object) - np.mean(observations_kernel)) <= MAX_Z * se
+
+
+@pytest.mark.parametrize('therapy', list(param.Therapies))
+def test_kernel_backend_agrees_with_object_backend(therapy):
+
+    cohort_object = simulate(therapy=therapy, backend=model.Backends.OBJECT)
+    cohort_kernel = simulate(therapy=therapy, backend=model.Backends.KERNEL)
+
+    outcomes_object = cohort_object.cohortOutcomes
+    outcomes_kernel = cohort_kernel.cohortOutcomes
+
+    assert_same_mean(outcomes_object.costs, outcomes_kernel.costs)
+    assert_same_mean(outcomes_object.utilities, outcomes_kernel.utilities)
+    assert_same_mean(outcomes_object.timesToAsthma, outcomes_kernel.timesToAsthma)
+
+    # number of patients with an exacerbation
+    p_object = len(outcomes_object.timesToAsthma) / POP_SIZE
+    p_kernel = len(outcomes_kernel.timesToAsthma) / POP_SIZE
+    se = np.sqrt((p_object * (1 - p_object) + p_kernel * (1 - p_kernel)) / POP_SIZE)
+    assert abs(p_object - p_kernel) <= MAX_Z * se
+
+    # prevalence of each state at each time step
+    prevalence_object = cohort_object.stateOccupancy.get_prevalence()
+    prevalence_kernel = cohort_kernel.stateOccupancy.get_prevalence()
+    se = np.sqrt((prevalence_object * (1 - prevalence_object)
+                  + prevalence_kernel * (1 - prevalence_kernel)) / POP_SIZE)
+    assert np.all(np.abs(prevalence_object - prevalence_kernel) <= MAX_Z * se + 1e-12)
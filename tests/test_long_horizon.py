@@ -0,0 +1,76 @@
+import copy
+
+import numpy as np
+import pytest
+
+import asthma_cost_eval.long_horizon as horizon
+import asthma_cost_eval.model_classes as model
+import asthma_cost_eval.param_classes as param
+
+N_TIME_STEPS = 520
+
+
+def get_expected_outcomes_by_loop(parameters, n_time_steps):
+    """ expected discounted cost and utility of the weekly model calculated one time step at a time """
+
+    prob_matrix = np.asarray(parameters.probMatrix, dtype=float)
+    costs = np.asarray(parameters.annualStateCosts, dtype=float)
+    utilities = np.asarray(parameters.annualStateUtilities, dtype=float)
+
+    state_probs = np.zeros(len(prob_matrix))
+    state_probs[parameters.initialHealthState.value] = 1
+
+    cost, utility = 0, 0
+    for k in range(n_time_steps):
+        new_state_probs = state_probs @ prob_matrix
+        discount = (1 + parameters.discountRate / 2) ** -(2 * k + 1)
+        cost += (0.5 * (state_probs @ costs + new_state_probs @ costs) + parameters.annualTreatmentCost) * discount
+        utility += 0.5 * (state_probs @ utilities + new_state_probs @ utilities) * discount
+        state_probs = new_state_probs
+
+    return cost, utility
+
+
+@pytest.mark.parametrize('therapy', list(param.Therapies))
+def test_weekly_expectations_equal_time_step_loop(therapy):
+
+    parameters = copy.copy(param.Parameters(therapy=therapy))
+    parameters.discountRate = 0.001
+
+    expectations = horizon.CohortExpectations(parameters=parameters, n_time_steps=N_TIME_STEPS)
+    cost, utility = get_expected_outcomes_by_loop(parameters=parameters, n_time_steps=N_TIME_STEPS)
+
+    assert expectations.expectedDiscountedCost == pytest.approx(cost, rel=1e-10)
+    assert expectations.expectedDiscountedUtility == pytest.approx(utility, rel=1e-10)
+
+
+@pytest.mark.parametrize('cycle_length', [2, 4, 52])
+def test_longer_cycles_keep_undiscounted_expectations(cycle_length):
+
+    parameters = param.Parameters(therapy=param.Therapies.DAILY)
+    weekly = horizon.CohortExpectations(parameters=parameters, n_time_steps=1040)
+    per_cycle = horizon.CohortExpectations(
+        parameters=horizon.get_parameters_for_cycle(parameters=parameters, cycle_length=cycle_length),
+        n_time_steps=horizon.get_n_cycles(horizon=1040, cycle_length=cycle_length))
+
+    assert per_cycle.expectedDiscountedCost == pytest.approx(weekly.expectedDiscountedCost, rel=1e-10)
+    assert per_cycle.expectedDiscountedUtility == pytest.approx(weekly.expectedDiscountedUtility, rel=1e-10)
+
+
+def test_weekly_expectations_agree_with_kernel_cohort():
+
+    parameters = param.Parameters(therapy=param.Therapies.DAILY)
+    expectations = horizon.CohortExpectations(parameters=parameters, n_time_steps=52)
+
+    cohort = model.Cohort(id=1, pop_size=20000, parameters=parameters, backend=model.Backends.KERNEL)
+    cohort.simulate(n_time_steps=52)
+
+    costs = np.asarray(cohort.cohortOutcomes.costs)
+    assert abs(costs.mean() - expectations.expectedDiscountedCost) <= 4 * costs.std() / np.sqrt(len(costs))
+
+
+def test_horizon_should_be_whole_number_of_cycles():
+
+    assert horizon.get_n_cycles(horizon=52, cycle_length=4) == 13
+    with pytest.raises(ValueError):
+        horizon.get_n_cycles(horizon=50, cycle_length=4)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import asthma_cost_eval.model_classes as model
+import asthma_cost_eval.param_classes as param
+import asthma_cost_eval.population_classes as population
+
+POP_SIZE = 1000
+N_TIME_STEPS = 52
+
+
+def simulate_homogeneous_population(therapy, adherence):
+    attributes = population.PatientAttributes(risk_multipliers=np.ones(POP_SIZE),
+                                              age_groups=np.full(POP_SIZE, param.AgeGroups.SCHOOL.value),
+                                              adherences=np.full(POP_SIZE, adherence))
+    cohort = population.HeterogeneousCohort(id=1, therapy=therapy, patient_attributes=attributes)
+    cohort.simulate(n_time_steps=N_TIME_STEPS)
+    return cohort
+
+
+def test_average_patients_match_kernel_cohort():
+
+    for therapy in param.Therapies:
+        heterogeneous_cohort = simulate_homogeneous_population(therapy=therapy, adherence=1)
+
+        cohort = model.Cohort(id=1, pop_size=POP_SIZE, parameters=param.Parameters(therapy=therapy),
+                              backend=model.Backends.KERNEL)
+        cohort.simulate(n_time_steps=N_TIME_STEPS)
+
+        np.testing.assert_array_equal(heterogeneous_cohort.cohortOutcomes.costs, cohort.cohortOutcomes.costs)
+        np.testing.assert_array_equal(heterogeneous_cohort.cohortOutcomes.utilities, cohort.cohortOutcomes.utilities)
+        np.testing.assert_array_equal(heterogeneous_cohort.cohortOutcomes.timesToAsthma,
+                                      cohort.cohortOutcomes.timesToAsthma)
+        np.testing.assert_array_equal(heterogeneous_cohort.stateOccupancy.counts, cohort.stateOccupancy.counts)
+
+
+def test_non_adherence_lowers_the_cost_of_daily_doses():
+
+    def get_patient_state_costs(adherence):
+        cohort = simulate_homogeneous_population(therapy=param.Therapies.DAILY, adherence=adherence)
+        return cohort.profileParams[cohort.profileIndices[0]].annualStateCosts
+
+    # fully adherent patients pay the costs of daily therapy and fully non-adherent patients those of
+    # intermittent therapy
+    np.testing.assert_allclose(get_patient_state_costs(adherence=1),
+                               param.Parameters(therapy=param.Therapies.DAILY).annualStateCosts)
+    np.testing.assert_allclose(get_patient_state_costs(adherence=0),
+                               param.Parameters(therapy=param.Therapies.INTERMITTENT).annualStateCosts)
@@ -0,0 +1,10 @@
+import pytest
+
+from asthma_cost_eval.prevalence_classes import StateOccupancy
+
+
+def test_merge_rejects_different_shapes():
+
+    occupancy = StateOccupancy(n_time_steps=52)
+    with pytest.raises(ValueError):
+        occupancy.merge(StateOccupancy(n_time_steps=53))
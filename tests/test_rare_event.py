@@ -0,0 +1,70 @@
+import numpy as np
+
+import asthma_cost_eval.model_classes as model
+import asthma_cost_eval.param_classes as param
+import asthma_cost_eval.rare_event_classes as rare
+from asthma_cost_eval.input_data import HealthStates
+from asthma_cost_eval.output_classes import OutcomeWriter, read_column
+from asthma_cost_eval.prevalence_classes import StateOccupancy
+
+POP_SIZE_IS = 2000      # patients sampled with importance sampling
+POP_SIZE = 100000       # patients of the plain (kernel) cohort
+N_TIME_STEPS = 52
+MAX_Z = 4   # largest accepted difference between the estimators (in standard errors)
+
+
+def simulate_cohorts(dir_name):
+    parameters = param.Parameters(therapy=param.Therapies.DAILY)
+
+    cohort_is = rare.ImportanceSamplingCohort(id=1, pop_size=POP_SIZE_IS, parameters=parameters)
+    with OutcomeWriter(dir_name=dir_name) as outcome_writer:
+        cohort_is.simulate(n_time_steps=N_TIME_STEPS, outcome_writer=outcome_writer)
+
+    cohort = model.Cohort(id=1, pop_size=POP_SIZE, parameters=parameters, backend=model.Backends.KERNEL)
+    cohort.simulate(n_time_steps=N_TIME_STEPS)
+
+    return cohort_is, cohort
+
+
+def assert_same_mean(weighted_stat, observations, n=None):
+    n = len(observations) if n is None else n
+    se = np.sqrt(weighted_stat.get_stdev_of_mean() ** 2 + np.var(observations, ddof=1) / n)
+    assert abs(weighted_stat.get_mean() - np.sum(observations) / n) <= MAX_Z * se
+
+
+def test_weighted_estimators_agree_with_plain_sampling(tmp_path):
+
+    cohort_is, cohort = simulate_cohorts(dir_name=str(tmp_path))
+    outcomes_is = cohort_is.cohortOutcomes
+    outcomes = cohort.cohortOutcomes
+
+    assert_same_mean(outcomes_is.statCost, outcomes.costs)
+    assert_same_mean(outcomes_is.statUtility, outcomes.utilities)
+    assert_same_mean(outcomes_is.statTimeToAsthma, outcomes.timesToAsthma)
+    assert_same_mean(outcomes_is.statProbAsthma, np.ones(len(outcomes.timesToAsthma)), n=POP_SIZE)
+
+    # weighted prevalence and its delta-method standard errors
+    prevalence = cohort.stateOccupancy.get_prevalence()
+    se = np.sqrt(cohort_is.stateOccupancy.get_st_errors() ** 2 + cohort.stateOccupancy.get_st_errors() ** 2)
+    assert np.all(np.abs(cohort_is.stateOccupancy.get_prevalence() - prevalence) <= MAX_Z * se + 1e-12)
+
+    # weeks in asthma
+    weeks_in_asthma = cohort.stateOccupancy.counts[:, HealthStates.ASTHMA.value].sum() / POP_SIZE
+    assert abs(outcomes_is.statAsthmaWeeks.get_mean() - weeks_in_asthma) \
+        <= MAX_Z * outcomes_is.statAsthmaWeeks.get_stdev_of_mean() + 0.01
+
+    # the written outcomes keep their likelihood-ratio weights
+    np.testing.assert_allclose(read_column(str(tmp_path), 'weight'), outcomes_is.weights)
+
+
+def test_unit_weights_give_binomial_standard_errors():
+
+    rng = np.random.RandomState(seed=0)
+    occupancy = StateOccupancy(n_time_steps=N_TIME_STEPS)
+    weighted_occupancy = StateOccupancy(n_time_steps=N_TIME_STEPS, if_weighted=True)
+    for _ in range(100):
+        state_path = rng.randint(0, len(HealthStates), size=N_TIME_STEPS)
+        occupancy.record_path(state_path=state_path)
+        weighted_occupancy.record_path(state_path=state_path, weight=1)
+
+    np.testing.assert_allclose(weighted_occupancy.get_st_errors(), occupancy.get_st_errors())
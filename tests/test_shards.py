@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import asthma_cost_eval.input_data as data
+import asthma_param_uncertainity.model_classes as model
+import asthma_param_uncertainity.param_classes as param
+
+N_COHORTS = 7
+POP_SIZE = 10
+N_TIME_STEPS = 52
+
+
+def simulate_unsharded():
+    multi_cohort = model.MultiCohort(ids=range(N_COHORTS), pop_size=POP_SIZE, therapy=param.Therapies.DAILY)
+    multi_cohort.simulate(n_time_steps=N_TIME_STEPS)
+    return multi_cohort.multiCohortOutcomes
+
+
+@pytest.mark.parametrize('n_shards', [1, 2, 3, 8])
+def test_merged_shards_equal_single_process_run(tmp_path, n_shards):
+
+    expected = simulate_unsharded()
+
+    file_names = []
+    for shard_index in range(1, n_shards + 1):
+        multi_cohort = model.MultiCohort(ids=range(N_COHORTS), pop_size=POP_SIZE, therapy=param.Therapies.DAILY,
+                                         shard='{}/{}'.format(shard_index, n_shards))
+        multi_cohort.simulate(n_time_steps=N_TIME_STEPS)
+        file_name = str(tmp_path / 'shard_{}.npz'.format(shard_index))
+        model.write_shard_file(simulated_multi_cohort=multi_cohort, file_name=file_name)
+        file_names.append(file_name)
+
+    merged = model.merge_shard_files(file_names=file_names)
+
+    assert merged.cohortPositions == list(range(N_COHORTS))
+    assert merged.meanCosts == expected.meanCosts
+    assert merged.meanQALYs == expected.meanQALYs
+    np.testing.assert_array_equal(merged.meanTimeToAsthma, expected.meanTimeToAsthma)
+    np.testing.assert_array_equal(merged.occupancy.prevalences, expected.occupancy.prevalences)
+    assert merged.statMeanCost.get_mean() == expected.statMeanCost.get_mean()
+
+
+def test_merge_rejects_missing_shard(tmp_path):
+
+    multi_cohort = model.MultiCohort(ids=range(N_COHORTS), pop_size=POP_SIZE, therapy=param.Therapies.DAILY,
+                                     shard='1/2')
+    multi_cohort.simulate(n_time_steps=N_TIME_STEPS)
+    file_name = str(tmp_path / 'shard_1.npz')
+    model.write_shard_file(simulated_multi_cohort=multi_cohort, file_name=file_name)
+
+    with pytest.raises(ValueError):
+        model.merge_shard_files(file_names=[file_name])
+
+
+def test_merge_rejects_shards_with_different_prob_matrix_draws(tmp_path):
+
+    draws = np.array([data.S_TRANS_MATRIX_DAILY])
+
+    file_names = []
+    for shard_index, prob_matrix_draws in [(1, None), (2, draws)]:
+        multi_cohort = model.MultiCohort(ids=range(N_COHORTS), pop_size=POP_SIZE, therapy=param.Therapies.DAILY,
+                                         shard='{}/2'.format(shard_index), prob_matrix_draws=prob_matrix_draws)
+        multi_cohort.simulate(n_time_steps=N_TIME_STEPS)
+        file_name = str(tmp_path / 'shard_{}.npz'.format(shard_index))
+        model.write_shard_file(simulated_multi_cohort=multi_cohort, file_name=file_name)
+        file_names.append(file_name)
+
+    with pytest.raises(ValueError):
+        model.merge_shard_files(file_names=file_names)